@@ -0,0 +1,91 @@
+"""
+Measure the latency of an unrelated endpoint while a burst of logins verifies bcrypt passwords.
+
+Usage::
+
+    python -m benchmarks.login_burst --logins 50 --pings 500
+
+Two tiny apps are served in process through ``httpx.ASGITransport``. Both have an async ``/ping``
+route doing no work and a ``/login`` route that verifies one password. "inline" verifies on the
+event loop, as the login route used to; "pool" awaits ``password_service.verify``. The logins are
+fired all at once while ``/ping`` is called back to back; the table shows ping latency.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.common import print_table
+from src.services.passwords import password_service
+
+PASSWORD = "12345678"
+
+
+def make_app(hashed: str, offload: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.post("/login")
+    async def login():
+        if offload:
+            valid = await password_service.verify(PASSWORD, hashed)
+        else:
+            valid = password_service.context.verify(PASSWORD, hashed)
+        return {"valid": valid}
+
+    return app
+
+
+async def ping_latencies(client: httpx.AsyncClient, pings: int) -> list[float]:
+    samples = []
+    for _ in range(pings):
+        started = time.perf_counter()
+        await client.get("/ping")
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def run(hashed: str, offload: bool, logins: int, pings: int) -> dict:
+    transport = httpx.ASGITransport(app=make_app(hashed, offload))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        burst = asyncio.gather(*(client.post("/login") for _ in range(logins)))
+        samples = await ping_latencies(client, pings)
+        await burst
+        elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "median": statistics.median(samples),
+        "p99": samples[max(0, int(len(samples) * 0.99) - 1)],
+        "max": samples[-1],
+        "elapsed": elapsed,
+    }
+
+
+async def main(logins: int, pings: int):
+    hashed = password_service.context.hash(PASSWORD)
+    rows = []
+    for name, offload in (("inline", False), ("pool", True)):
+        result = await run(hashed, offload, logins, pings)
+        rows.append([name, result["median"], result["p99"], result["max"], result["elapsed"]])
+    print_table(
+        f"/ping latency in ms during a burst of {logins} logins "
+        f"({password_service.workers} workers)",
+        ["login path", "p50", "p99", "max", "total s"],
+        rows,
+    )
+    print(password_service.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--pings", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.pings))
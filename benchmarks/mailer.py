@@ -0,0 +1,125 @@
+"""
+Measure mailer throughput against a local SMTP sink.
+
+Usage::
+
+    python -m benchmarks.mailer --messages 2000 --connections 1 4 8
+
+An in-process asyncio SMTP server accepts and discards every message, so the numbers show the
+client side only. "per message" opens, uses and closes one SMTP connection per email, like the
+previous ``FastMail`` call per request. "pooled" is ``Mailer.send_batch`` over long-lived
+connections with cached templates. The outbox is replaced by an in-memory stub; no Redis is needed.
+"""
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+
+from benchmarks.common import print_table
+from src.services.mailer import Mailer
+
+
+class SinkProtocol(asyncio.Protocol):
+    """
+    The smallest SMTP server that clients accept: every command succeeds, messages are dropped.
+    """
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b""
+        self.in_data = False
+        transport.write(b"220 sink ESMTP\r\n")
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n" in self.buffer:
+            if self.in_data:
+                end = self.buffer.find(b"\r\n.\r\n")
+                if end < 0:
+                    return
+                self.buffer = self.buffer[end + 5 :]
+                self.in_data = False
+                self.transport.write(b"250 OK\r\n")
+                continue
+            line, self.buffer = self.buffer.split(b"\r\n", 1)
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.transport.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif command == b"DATA":
+                self.in_data = True
+                self.buffer = b"\r\n" + self.buffer
+                self.transport.write(b"354 go ahead\r\n")
+            elif command == b"QUIT":
+                self.transport.write(b"221 bye\r\n")
+                self.transport.close()
+            else:
+                self.transport.write(b"250 OK\r\n")
+
+
+class MemoryOutbox:
+    async def ack(self, entry_ids):
+        pass
+
+    async def retry(self, entry_id, job, error):
+        raise RuntimeError(error)
+
+
+def make_jobs(count: int) -> list:
+    return [
+        (
+            str(i),
+            {
+                "template": "verify_email.html",
+                "subject": "Confirm your email ",
+                "to": f"user{i}@example.com",
+                "context": {"host": "http://localhost/", "username": f"user{i}", "token": "x" * 150},
+                "attempts": 0,
+            },
+        )
+        for i in range(count)
+    ]
+
+
+async def per_message(mailer: Mailer, port: int, jobs: list):
+    for _, job in jobs:
+        smtp = aiosmtplib.SMTP(hostname="127.0.0.1", port=port)
+        await smtp.connect()
+        await smtp.send_message(mailer.render(job))
+        await smtp.quit()
+
+
+async def main(messages: int, connections: list[int], batch: int):
+    server = await asyncio.get_running_loop().create_server(SinkProtocol, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    jobs = make_jobs(messages)
+
+    def mailer(size: int) -> Mailer:
+        return Mailer(
+            MemoryOutbox(), size, batch, "127.0.0.1", port, sender="bench@example.com"
+        )
+
+    rows = []
+    started = time.perf_counter()
+    await per_message(mailer(1), port, jobs)
+    rows.append(["per message", 1, messages / (time.perf_counter() - started)])
+    for size in connections:
+        pooled = mailer(size)
+        started = time.perf_counter()
+        for first in range(0, messages, batch):
+            await pooled.send_batch(jobs[first : first + batch])
+        rows.append(["pooled", size, messages / (time.perf_counter() - started)])
+        for smtp in pooled.pool:
+            await smtp.quit()
+    server.close()
+    await server.wait_closed()
+    print_table("mailer throughput", ["mode", "connections", "messages/s"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.connections, args.batch))
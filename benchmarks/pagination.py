@@ -0,0 +1,66 @@
+"""
+Compare offset and keyset (cursor) pagination of ``repository.contacts.get_contacts``.
+
+Usage::
+
+    python -m benchmarks.pagination --rows 100010 --limit 10
+
+Pages 1, 100 and 10,000 are measured. The cursor for a deep page is taken from the last ``id`` of
+the preceding page, which is exactly what a client following ``X-Next-Cursor`` would send.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from benchmarks.common import make_engine, print_table, seed_contacts, timeit
+from src.entity.models import Contact
+from src.repository.contacts import encode_cursor, get_contacts
+
+
+async def main(rows: int, limit: int, repeat: int, pages: list[int]):
+    engine, session_maker = make_engine()
+    user = await seed_contacts(engine, session_maker, rows)
+    results = []
+    async with session_maker() as session:
+        for page in pages:
+            offset = (page - 1) * limit
+            if offset >= rows:
+                continue
+            cursor = None
+            if offset:
+                last_id = await session.scalar(
+                    select(Contact.id)
+                    .filter(Contact.user_id == user.id)
+                    .order_by(Contact.id)
+                    .offset(offset - 1)
+                    .limit(1)
+                )
+                cursor = encode_cursor(last_id)
+            by_offset = await timeit(
+                lambda: get_contacts(None, None, None, offset, limit, session, user),
+                repeat,
+            )
+            by_cursor = await timeit(
+                lambda: get_contacts(None, None, None, 0, limit, session, user, cursor=cursor),
+                repeat,
+            )
+            results.append(
+                [page, by_offset["median"], by_offset["p95"], by_cursor["median"], by_cursor["p95"]]
+            )
+    await engine.dispose()
+    print_table(
+        f"get_contacts, {rows} rows, limit {limit}, latency in ms",
+        ["page", "offset p50", "offset p95", "cursor p50", "cursor p95"],
+        results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_010)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat, args.pages))
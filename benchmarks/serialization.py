@@ -0,0 +1,84 @@
+"""
+Compare the CPU cost of serializing contact lists through FastAPI's default response path and
+through ``src.services.serialization.json_response``.
+
+Usage::
+
+    python -m benchmarks.serialization --sizes 10 100 499
+
+"default" is what a route returning ORM objects with ``response_model=list[ContactResponse]``
+does: ``serialize_response`` (validation plus ``jsonable_encoder``) followed by ``JSONResponse``
+(``json.dumps``). "adapter" validates once with the prebuilt ``TypeAdapter`` and dumps bytes with
+pydantic-core. No database is involved; the ORM objects are built in memory.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.common import print_table
+from src.entity.models import Contact, User
+from src.schemas.contacts import ContactResponse
+from src.services.cache import contact_list_adapter
+from src.services.serialization import json_response
+
+
+def make_contacts(size: int) -> list[Contact]:
+    user = User(id=1, username="bench", email="bench@example.com")
+    return [
+        Contact(
+            id=i,
+            name=f"name{i}",
+            surname=f"surname{i}",
+            email=f"contact{i}@example.com",
+            phone_number=f"{i:012d}",
+            birthdate=datetime(1990, 1, 1),
+            created_at=datetime(2025, 1, 1),
+            user=user,
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+async def default_path(field, contacts):
+    content = await serialize_response(field=field, response_content=contacts)
+    return JSONResponse(content)
+
+
+async def adapter_path(contacts):
+    return json_response(contacts, contact_list_adapter)
+
+
+async def cpu_per_call(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        await func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def main(sizes: list[int], repeat: int):
+    field = create_model_field(name="Response", type_=list[ContactResponse], mode="serialization")
+    rows = []
+    for size in sizes:
+        contacts = make_contacts(size)
+        assert (await default_path(field, contacts)).body == (await adapter_path(contacts)).body
+        default = await cpu_per_call(lambda: default_path(field, contacts), repeat)
+        adapter = await cpu_per_call(lambda: adapter_path(contacts), repeat)
+        rows.append([size, default, adapter, default / adapter])
+    print_table(
+        "list serialization, CPU ms per request",
+        ["items", "default", "adapter", "speedup"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 499])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
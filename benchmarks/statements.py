@@ -0,0 +1,114 @@
+"""
+Compare the CPU cost per call of the hot repository reads with statements rebuilt on every call
+and with the prebuilt statements of ``src.repository``.
+
+Usage::
+
+    python -m benchmarks.statements --rows 1000 --repeat 2000
+
+"rebuilt" constructs the ``select(...)`` like the repository used to, so SQLAlchemy has to build
+and traverse it for its cache key before finding the compiled SQL. "cached" executes the prebuilt
+statements with bound parameters. The "build" columns time only the preparation of the statement
+up to its cache key; the "execute" columns time the whole call against ``BENCH_DB_URL``.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import and_, select
+
+from benchmarks.common import make_engine, print_table, seed_contacts
+from src.entity.models import Contact, User
+from src.repository.contacts import CONTACT_BY_ID, contacts_list_statement, get_contact, get_contacts
+from src.repository.users import USER_BY_EMAIL, get_user_by_email
+
+
+def cpu_per_call_sync(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def cpu_per_call(func, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        await func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def rebuilt_list_query(name: str, offset: int, limit: int, user: User):
+    filters = [Contact.name.ilike(f"%{name}%"), Contact.user == user]
+    return select(Contact).filter(and_(*filters)).order_by(Contact.id).offset(offset).limit(limit)
+
+
+def ids(result) -> list:
+    rows = result if isinstance(result, list) else [result]
+    return [row.id for row in rows]
+
+
+async def main(rows: int, repeat: int):
+    engine, session_maker = make_engine()
+    user = await seed_contacts(engine, session_maker, rows)
+    contact_id = rows // 2
+
+    async def rebuilt_list(db):
+        stmt = rebuilt_list_query("name1", 0, 10, user)
+        return (await db.execute(stmt)).scalars().all()
+
+    async def rebuilt_contact(db):
+        stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    async def rebuilt_user(db):
+        stmt = select(User).filter(User.email == user.email)
+        return (await db.execute(stmt)).scalar_one_or_none()
+
+    cases = [
+        (
+            "list by owner",
+            lambda: rebuilt_list_query("name1", 0, 10, user)._generate_cache_key(),
+            lambda: contacts_list_statement(True, False, False, False)._generate_cache_key(),
+            rebuilt_list,
+            lambda db: get_contacts("name1", None, None, 0, 10, db, user),
+        ),
+        (
+            "contact by id",
+            lambda: select(Contact)
+            .filter(and_(Contact.id == contact_id, Contact.user == user))
+            ._generate_cache_key(),
+            lambda: CONTACT_BY_ID._generate_cache_key(),
+            rebuilt_contact,
+            lambda db: get_contact(contact_id, db, user),
+        ),
+        (
+            "user by email",
+            lambda: select(User).filter(User.email == user.email)._generate_cache_key(),
+            lambda: USER_BY_EMAIL._generate_cache_key(),
+            rebuilt_user,
+            lambda db: get_user_by_email(user.email, db),
+        ),
+    ]
+    results = []
+    async with session_maker() as db:
+        for name, build_rebuilt, build_cached, run_rebuilt, run_cached in cases:
+            assert ids(await run_rebuilt(db)) == ids(await run_cached(db))
+            rebuilt_build = cpu_per_call_sync(build_rebuilt, repeat)
+            cached_build = cpu_per_call_sync(build_cached, repeat)
+            rebuilt_run = await cpu_per_call(lambda: run_rebuilt(db), repeat)
+            cached_run = await cpu_per_call(lambda: run_cached(db), repeat)
+            results.append([name, rebuilt_build, cached_build, rebuilt_run, cached_run])
+    await engine.dispose()
+    print_table(
+        f"hot reads, CPU ms per call ({rows} contacts)",
+        ["query", "build rebuilt", "build cached", "exec rebuilt", "exec cached"],
+        results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,99 @@
+"""
+Compare contact write latency before and after the single-statement ``RETURNING`` rewrite.
+
+Usage::
+
+    python -m benchmarks.writes --rows 1000 --repeat 200
+
+"before" replays the previous implementation (SELECT, mutate through the ORM, COMMIT, refresh for
+updates; SELECT, ``session.delete``, COMMIT for deletes). "after" calls the current repository
+functions, which issue one ``UPDATE ... RETURNING`` / ``DELETE ... RETURNING`` plus COMMIT.
+"""
+import argparse
+import asyncio
+import itertools
+
+from sqlalchemy import and_, select
+
+from benchmarks.common import make_engine, print_table, seed_contacts, timeit
+from src.entity.models import Contact
+from src.repository.contacts import delete_contact, update_contact
+from src.schemas.contacts import ContactShema
+
+
+async def update_contact_before(contact_id, body, db, user):
+    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
+    result = await db.execute(stmt)
+    contact = result.scalar_one_or_none()
+    if contact:
+        contact.name = body.name
+        contact.surname = body.surname
+        contact.email = body.email
+        contact.phone_number = body.phone_number
+        contact.birthdate = body.birthdate
+        await db.commit()
+        await db.refresh(contact)
+    return contact
+
+
+async def delete_contact_before(contact_id, db, user):
+    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
+    result = await db.execute(stmt)
+    contact = result.scalar_one_or_none()
+    if contact:
+        await db.delete(contact)
+        await db.commit()
+    return contact
+
+
+async def main(rows: int, repeat: int):
+    engine, session_maker = make_engine()
+    user = await seed_contacts(engine, session_maker, rows)
+    async with session_maker() as session:
+        ids = list(range(1, rows + 1))
+        bodies = itertools.count()
+
+        def body(contact_id):
+            n = next(bodies)
+            return ContactShema(
+                name=f"name{n}",
+                surname=f"surname{n}",
+                email=f"contact{n}@example.com",
+                phone_number=f"9{contact_id:011d}",
+                birthdate="1990-05-01",
+            )
+
+        targets = itertools.cycle(ids[: rows // 2])
+        update_before = await timeit(
+            lambda: update_contact_before((i := next(targets)), body(i), session, user), repeat
+        )
+        update_after = await timeit(
+            lambda: update_contact((i := next(targets)), body(i), session, user), repeat
+        )
+        deletable = iter(ids[rows // 2 :])
+        delete_before = await timeit(
+            lambda: delete_contact_before(next(deletable), session, user), repeat
+        )
+        delete_after = await timeit(lambda: delete_contact(next(deletable), session, user), repeat)
+    await engine.dispose()
+    print_table(
+        "contact writes, latency in ms",
+        ["operation", "before p50", "before p95", "after p50", "after p95"],
+        [
+            [name, before["median"], before["p95"], after["median"], after["p95"]]
+            for name, before, after in (
+                ("update", update_before, update_after),
+                ("delete", delete_before, delete_after),
+            )
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    if args.rows < 4 * args.repeat:
+        parser.error("--rows must be at least 4 * --repeat so every delete hits a row")
+    asyncio.run(main(args.rows, args.repeat))
@@ -5,13 +5,20 @@ from fastapi_limiter import FastAPILimiter
 import uvicorn
 import redis.asyncio as redis
 
-from src.routes import contacts, users, auth
+from src.routes import contacts, users, auth, metrics
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.services.avatars import UploadLimitMiddleware
+from src.services.invalidation import invalidation_bus
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     r = await redis.Redis(host='localhost', port=6379, db=0, encoding="utf-8", decode_responses=True)
     await FastAPILimiter.init(r)
+    invalidation_bus.start()
     yield
+    await invalidation_bus.stop()
+    await sessionmanager.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -22,11 +29,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# the multipart envelope adds a little on top of the file itself
+app.add_middleware(
+    UploadLimitMiddleware, path="/api/users/avatar", max_bytes=config.AVATAR_MAX_BYTES + 64 * 1024
+)
 
 
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix='/api')
+app.include_router(metrics.router, prefix='/api')
 
 
 @app.get("/api/healthchecker")
@@ -0,0 +1,35 @@
+"""Contacts birthday key
+
+Revision ID: 2d8a5f61c7e9
+Revises: 9c4e27a1b3f0
+Create Date: 2026-10-17 12:40:05.117342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8a5f61c7e9'
+down_revision: Union[str, None] = '9c4e27a1b3f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_key', sa.Integer(), nullable=True))
+    op.execute(
+        'UPDATE contacts SET birthday_key = '
+        'EXTRACT(MONTH FROM birthdate) * 100 + EXTRACT(DAY FROM birthdate)'
+    )
+    op.alter_column('contacts', 'birthday_key', nullable=False)
+    op.create_index(
+        'ix_contacts_user_id_birthday_key', 'contacts', ['user_id', 'birthday_key'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_key', table_name='contacts')
+    op.drop_column('contacts', 'birthday_key')
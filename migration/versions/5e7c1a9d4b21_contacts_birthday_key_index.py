@@ -0,0 +1,26 @@
+"""Contacts birthday key index for the digest job
+
+Revision ID: 5e7c1a9d4b21
+Revises: 2d8a5f61c7e9
+Create Date: 2026-10-17 18:20:41.307114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7c1a9d4b21'
+down_revision: Union[str, None] = '2d8a5f61c7e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_birthday_key_user_id', 'contacts', ['birthday_key', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_birthday_key_user_id', table_name='contacts')
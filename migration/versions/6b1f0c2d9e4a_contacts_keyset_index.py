@@ -0,0 +1,26 @@
+"""Contacts keyset index
+
+Revision ID: 6b1f0c2d9e4a
+Revises: d0e065b73a54
+Create Date: 2026-10-17 10:02:11.418530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1f0c2d9e4a'
+down_revision: Union[str, None] = 'd0e065b73a54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
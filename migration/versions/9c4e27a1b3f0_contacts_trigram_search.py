@@ -0,0 +1,38 @@
+"""Contacts trigram search
+
+Revision ID: 9c4e27a1b3f0
+Revises: 6b1f0c2d9e4a
+Create Date: 2026-10-17 11:24:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e27a1b3f0'
+down_revision: Union[str, None] = '6b1f0c2d9e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('name', 'surname', 'email')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in COLUMNS:
+        op.create_index(
+            f'ix_contacts_{column}_trgm',
+            'contacts',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    for column in COLUMNS:
+        op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts')
@@ -1,21 +1,318 @@
+import bisect
 import contextlib
+import itertools
+import logging
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.conf.config import config
+from src.services.invalidation import invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the checkout wait histogram, in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolTelemetry:
+    """
+    Counters of one connection pool: checkouts, connections opened and invalidated, timeouts and a
+    histogram of the time spent waiting for a connection.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        self.wait_counts = [0] * (len(self.buckets) + 1)
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float):
+        ms = seconds * 1000
+        self.wait_counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.wait_total += ms
+        self.wait_max = max(self.wait_max, ms)
+
+    def listen(self, engine: AsyncEngine):
+        """
+        The function `listen` counts the pool events of `engine` and times its checkouts.
+        """
+        engine.pool.telemetry = self
+        event.listen(engine.sync_engine, "checkout", self.on_checkout)
+        event.listen(engine.sync_engine, "connect", self.on_connect)
+        event.listen(engine.sync_engine, "invalidate", self.on_invalidate)
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidated += 1
+
+    def stats(self) -> dict:
+        """
+        The function `stats` returns the counters and the wait histogram, with cumulative counts per
+        upper bound in milliseconds as in Prometheus.
+        """
+        waits = sum(self.wait_counts)
+        histogram, running = {}, 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.wait_counts):
+            running += count
+            histogram[bound] = running
+        return {
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidated": self.invalidated,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "count": waits,
+                "sum": self.wait_total,
+                "mean": self.wait_total / waits if waits else 0.0,
+                "max": self.wait_max,
+                "buckets": histogram,
+            },
+        }
+
+
+class TimedPool(AsyncAdaptedQueuePool):
+    """
+    The asyncio queue pool, timing how long each checkout waits for a connection, including the time
+    to open a new one when the pool is below its limit.
+    """
+
+    telemetry: PoolTelemetry | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.telemetry is not None:
+                self.telemetry.timeouts += 1
+            raise
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.observe_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() replaces the pool; keep counting into the same telemetry
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+def pool_stats(engine: AsyncEngine, telemetry: PoolTelemetry) -> dict:
+    """
+    The function `pool_stats` returns the state of the connection pool of an engine in this process:
+    its size, the connections checked out, idle and in overflow, and the telemetry counters.
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+        **telemetry.stats(),
+    }
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.telemetry = PoolTelemetry()
+        self.telemetry.listen(engine)
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.reads = 0
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary database, chosen round-robin for reads.
+
+    Reads of a key go to the primary for ``sticky_seconds`` after the key was written, so a user
+    reads their own writes despite replication lag; the writers announce this with ``stick``. A
+    replica whose connection fails is ejected for ``eject_seconds`` and then tried again.
+    """
+
+    def __init__(self, replicas: list[Replica], sticky_seconds: float, eject_seconds: float):
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.eject_seconds = eject_seconds
+        self.sticky: dict[tuple[str, str], float] = {}
+        self.sticky_all_until = 0.0
+        self.turn = itertools.count()
+        self.primary_reads = 0
+
+    def stick(self, kind: str, key: str | None):
+        """
+        The function `stick` sends the reads of `key` to the primary for the next `sticky_seconds`.
+        `None` sends every read there, for when writes may have gone unannounced.
+        """
+        now = time.monotonic()
+        until = now + self.sticky_seconds
+        if key is None:
+            self.sticky_all_until = until
+            self.sticky.clear()
+            return
+        if len(self.sticky) >= 10000:
+            self.sticky = {k: v for k, v in self.sticky.items() if v > now}
+        self.sticky[(kind, str(key))] = until
+
+    def choose(self, kind: str, key) -> Replica | None:
+        """
+        The function `choose` returns the replica to read `key` from, or `None` to read from the
+        primary because the key was written recently or no replica is healthy.
+        """
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        if now < self.sticky_all_until or now < self.sticky.get((kind, str(key)), 0.0):
+            self.primary_reads += 1
+            return None
+        start = next(self.turn)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.ejected_until <= now:
+                replica.reads += 1
+                return replica
+        self.primary_reads += 1
+        return None
+
+    def eject(self, replica: Replica, err: Exception):
+        logger.warning("Ejecting read replica %s: %s", replica.engine.url, err)
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        replica.ejections += 1
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.ejected_until <= now,
+                "reads": replica.reads,
+                "ejections": replica.ejections,
+                **pool_stats(replica.engine, replica.telemetry),
+            }
+            for replica in self.replicas
+        ]
+
+
+class LazySession:
+    """
+    Stands in for an `AsyncSession` that is created on first use, so requests answered from caches
+    never build or close one. Every attribute is forwarded to the real session.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self._session_maker = session_maker
+        self._session: AsyncSession | None = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._session_maker()
+        return getattr(self._session, name)
 
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int | None = None,
+        prepared_statement_cache_size: int | None = None,
+        replica_urls: list[str] | None = None,
+        sticky_seconds: float = 5.0,
+        eject_seconds: float = 30.0,
+    ):
+        self._pool_options = {
+            "poolclass": TimedPool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+        }
+        self._statement_cache_size = statement_cache_size
+        self._prepared_statement_cache_size = prepared_statement_cache_size
+        self.telemetry = PoolTelemetry()
+        self._engine: AsyncEngine | None = self._create_engine(url)
+        self.telemetry.listen(self._engine)
+        self.replicas = ReplicaSet(
+            [Replica(self._create_engine(replica_url)) for replica_url in replica_urls or []],
+            sticky_seconds,
+            eject_seconds,
+        )
         self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            bind=self._engine,
+            info={"replicas": self.replicas},
         )
 
+    def _create_engine(self, url: str) -> AsyncEngine:
+        connect_args = {}
+        if make_url(url).get_driver_name() == "asyncpg":
+            # both must be 0 behind PgBouncer in transaction pooling mode
+            if self._statement_cache_size is not None:
+                connect_args["statement_cache_size"] = self._statement_cache_size
+            if self._prepared_statement_cache_size is not None:
+                # SQLAlchemy's own per-connection cache of the statements it prepares
+                connect_args["prepared_statement_cache_size"] = self._prepared_statement_cache_size
+        return create_async_engine(url, connect_args=connect_args, **self._pool_options)
+
+    def stats(self) -> dict:
+        """
+        The function `stats` returns the state of the connection pools of this process, the
+        primary's at the top level and each replica's under `replicas`.
+        """
+        if self._engine is None:
+            return {}
+        return {
+            **pool_stats(self._engine, self.telemetry),
+            "primary_reads": self.replicas.primary_reads,
+            "replicas": self.replicas.stats(),
+        }
+
+    async def close(self):
+        """
+        The function `close` closes every pooled connection. Sessions cannot be opened afterwards.
+        """
+        if self._engine is None:
+            return
+        for replica in self.replicas.replicas:
+            await replica.engine.dispose()
+        await self._engine.dispose()
+        self._engine = None
+        self._session_maker = None
+
     @contextlib.asynccontextmanager
     async def session(self):
         if self._session_maker is None:
@@ -23,16 +320,93 @@ class DatabaseSessionManager:
         session = self._session_maker()
         try:
             yield session
-        except Exception as err:
-            print(err)
+        except Exception:
+            logger.debug("Rolling back the session", exc_info=True)
             await session.rollback()
             raise
         finally:
             await session.close()
 
-sessionmanager = DatabaseSessionManager(config.DB_URL)
+    @contextlib.asynccontextmanager
+    async def lazy_session(self):
+        """
+        The function `lazy_session` works like `session` but yields a `LazySession`: nothing is
+        created, and no pooled connection is checked out, until the session is first used.
+        """
+        if self._session_maker is None:
+            raise Exception("Session is not initialized")
+        session = LazySession(self._session_maker)
+        try:
+            yield session
+        except Exception:
+            if session.opened:
+                logger.debug("Rolling back the session", exc_info=True)
+                await session.rollback()
+            raise
+        finally:
+            if session.opened:
+                await session.close()
+
+
+async def execute_read(db: AsyncSession, stmt, kind: str, key, params: dict | None = None):
+    """
+    The function `execute_read` runs a read-only statement on a read replica when one is healthy
+    and `key` has not been written recently, and on the primary otherwise.
+
+    Sessions with pending changes, and sessions not opened by a `DatabaseSessionManager` with
+    replicas, always read from the primary. If the replica fails to connect it is ejected and the
+    statement runs again on the primary.
+
+    :param db: The database session
+    :type db: AsyncSession
+    :param stmt: The statement to execute
+    :param kind: The kind of data read, matching the invalidation events of its writers, e.g.
+    `contacts` or `user`
+    :type kind: str
+    :param key: What is read, e.g. the owner's id or the user's email
+    :param params: The values of the statement's bound parameters
+    :type params: dict | None
+    :return: The result of the statement
+    """
+    replicas: ReplicaSet | None = db.info.get("replicas")
+    pending = db.new or db.dirty or db.deleted
+    replica = replicas.choose(kind, key) if replicas is not None and not pending else None
+    if replica is None:
+        return await db.execute(stmt, params)
+    try:
+        return await db.execute(stmt, params, bind_arguments={"bind": replica.engine.sync_engine})
+    except (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError) as err:
+        replicas.eject(replica, err)
+        return await db.execute(stmt, params)
+
+
+sessionmanager = DatabaseSessionManager(
+    config.DB_URL,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+    prepared_statement_cache_size=config.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    replica_urls=config.DB_REPLICA_URLS,
+    sticky_seconds=config.DB_REPLICA_STICKY_SECONDS,
+    eject_seconds=config.DB_REPLICA_EJECT_SECONDS,
+)
+# the writers of contacts and users announce their writes on the invalidation bus
+invalidation_bus.on("contacts", lambda key: sessionmanager.replicas.stick("contacts", key))
+invalidation_bus.on("user", lambda key: sessionmanager.replicas.stick("user", key))
 
 
 async def get_db():
-    async with sessionmanager.session() as session:
+    async with sessionmanager.lazy_session() as session:
         yield session
+
+
+def get_session_factory():
+    """
+    The function `get_session_factory` provides `sessionmanager.session` to work that outlives the
+    request, e.g. a streamed response body, which must not use the session of `get_db`: that one
+    is closed as soon as the endpoint returns.
+    """
+    return sessionmanager.session
@@ -1,10 +1,21 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, func
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, DateTime, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 
 Base = declarative_base()
 
+
+def birthday_key(birthdate) -> int:
+    """
+    Return the month-day key of a date as ``month * 100 + day``, e.g. 1231 for December 31.
+
+    The key orders birthdays within a calendar year regardless of the birth year, so upcoming
+    birthdays can be found with an index range scan.
+    """
+    return birthdate.month * 100 + birthdate.day
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -25,8 +36,38 @@ class Contact(Base):
     email = Column(String(100), nullable=False)
     phone_number = Column(String(15), nullable=False, unique=True)
     birthdate = Column(DateTime, nullable=False)
+    birthday_key = Column(Integer, nullable=False)
     created_at = Column("created_at", DateTime, default=func.now())
     
     user_id = Column(Integer, ForeignKey(User.id), nullable=True)
     user = relationship("User", backref="users", lazy="joined")
 
+    @validates("birthdate")
+    def validate_birthdate(self, key, value):
+        self.birthday_key = birthday_key(value) if value is not None else None
+        return value
+
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+        Index("ix_contacts_birthday_key_user_id", "birthday_key", "user_id"),
+        Index(
+            "ix_contacts_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_contacts_surname_trgm",
+            "surname",
+            postgresql_using="gin",
+            postgresql_ops={"surname": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_contacts_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
+
@@ -1,11 +1,59 @@
-from sqlalchemy import and_, func, select
+import base64
+import binascii
+import functools
+import json
+
+from sqlalchemy import ARRAY, Integer, and_, any_, bindparam, case, delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timedelta
 
-from src.entity.models import Contact, User
+from src.database.db import execute_read
+from src.entity.models import Contact, User, birthday_key
 from src.schemas.contacts import ContactShema
 
 
+def encode_cursor(contact_id: int) -> str:
+    """
+    The function `encode_cursor` turns the key of the last contact on a page into an opaque cursor
+    string that can be passed back to fetch the next page.
+
+    Args:
+      contact_id (int): The `id` of the last contact returned on the current page. Contacts are
+    listed in ascending `id` order, so it is a stable position in the result set.
+
+    Returns:
+      A URL-safe base64 string without padding that encodes the position.
+    """
+    raw = json.dumps({"id": contact_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    The function `decode_cursor` restores the contact `id` stored in a cursor created by
+    `encode_cursor`.
+
+    Args:
+      cursor (str): The opaque cursor string received from the client.
+
+    Returns:
+      The `id` of the last contact of the previous page.
+
+    Raises:
+      ValueError: If the cursor is malformed or was not produced by `encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        contact_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(contact_id, int) or isinstance(contact_id, bool):
+        raise ValueError("Invalid cursor")
+    return contact_id
+
+
 async def get_contacts(
     name: str,
     surname: str,
@@ -14,6 +62,7 @@ async def get_contacts(
     limit: int,
     db: AsyncSession,
     user: User,
+    cursor: str | None = None,
 ):
     """
     This Python async function retrieves contacts based on specified criteria from a database session.
@@ -47,24 +96,335 @@ async def get_contacts(
     filter contacts based on the user to whom they belong. The function retrieves contacts from the
     database that match the specified criteria (name, surname, email) and belong to the specified user
     :type user: User
+    :param cursor: The `cursor` parameter is an opaque string produced by `encode_cursor` from the
+    last contact of the previous page. When it is given, `offset` is ignored and the page starts right
+    after that contact (keyset pagination), so every page costs the same regardless of its depth
+    :type cursor: str | None
     :return: The function `get_contacts` returns a list of contacts that match the specified criteria
     (name, surname, email) for a specific user. The contacts are retrieved from the database using the
     provided AsyncSession `db` and the query is filtered based on the input parameters. The function
     returns all the contacts that match the criteria within the specified offset and limit.
     """
-    filters = []
+    stmt = contacts_list_statement(bool(name), bool(surname), bool(email), cursor is not None)
+    params = contacts_list_params(name, surname, email, offset, limit, user, cursor)
+    contacts = await execute_read(db, stmt, "contacts", user.id, params)
+    return contacts.scalars().all()
+
+
+def contacts_filters(name: bool, surname: bool, email: bool, cursor: bool) -> list:
+    """
+    The function `contacts_filters` builds the `WHERE` criteria shared by the contact listings for
+    one combination of filters, with the values left as bound parameters named like the keys of
+    `contacts_list_params`.
+
+    Args:
+      name (bool): Whether the contact name is filtered, with an `ILIKE` pattern.
+      surname (bool): Whether the contact surname is filtered.
+      email (bool): Whether the contact email is filtered.
+      cursor (bool): Whether only contacts after `after_id` are kept.
+
+    Returns:
+      A list of SQLAlchemy criteria to be combined with `and_`.
+    """
+    filters = [Contact.user_id == bindparam("user_id")]
     if name:
-        filters.append(Contact.name.ilike(f"%{name}%"))
+        filters.append(Contact.name.ilike(bindparam("name")))
     if surname:
-        filters.append(Contact.surname.ilike(f"%{surname}%"))
+        filters.append(Contact.surname.ilike(bindparam("surname")))
     if email:
-        filters.append(Contact.email.ilike(f"%{email}%"))
-    filters.append(Contact.user == user)
-    stmt = select(Contact).filter(and_(*filters)).offset(offset).limit(limit)
-    contacts = await db.execute(stmt)
+        filters.append(Contact.email.ilike(bindparam("email")))
+    if cursor:
+        filters.append(Contact.id > bindparam("after_id"))
+    return filters
+
+
+def contacts_list_params(
+    name: str,
+    surname: str,
+    email: str,
+    offset: int,
+    limit: int,
+    user: User,
+    cursor: str | None = None,
+) -> dict:
+    """
+    The function `contacts_list_params` binds the values of a listing to the parameters of
+    `contacts_list_statement` and of the statements derived from it.
+
+    Args:
+      name (str): Optional substring of the contact name.
+      surname (str): Optional substring of the contact surname.
+      email (str): Optional substring of the contact email.
+      offset (int): The number of contacts to skip when no cursor is given.
+      limit (int): The page size.
+      user (User): The owner of the contacts.
+      cursor (str | None): An opaque cursor from `encode_cursor`; it replaces `offset` if given.
+
+    Returns:
+      A dict of parameter values.
+
+    Raises:
+      ValueError: If the cursor is malformed.
+    """
+    params = {"user_id": user.id, "limit": limit}
+    if name:
+        params["name"] = f"%{name}%"
+    if surname:
+        params["surname"] = f"%{surname}%"
+    if email:
+        params["email"] = f"%{email}%"
+    if cursor is not None:
+        params["after_id"] = decode_cursor(cursor)
+    else:
+        params["offset"] = offset
+    return params
+
+
+@functools.cache
+def contacts_list_statement(name: bool, surname: bool, email: bool, cursor: bool):
+    """
+    The function `contacts_list_statement` returns the prebuilt `SELECT` of `get_contacts` for one
+    combination of filters. There are 16 of them, each built once; the values are bound at execution
+    as `user_id`, `name`, `surname`, `email`, `after_id`, `offset` and `limit`.
+
+    A prebuilt statement memoizes its cache key, so SQLAlchemy finds the compiled SQL without
+    rebuilding or traversing the query, and the SQL text stays the same from call to call, which lets
+    asyncpg reuse the prepared statement on each connection.
+
+    Args:
+      name (bool): Whether the contact name is filtered, with an `ILIKE` pattern.
+      surname (bool): Whether the contact surname is filtered.
+      email (bool): Whether the contact email is filtered.
+      cursor (bool): Whether the page starts after `after_id` instead of at `offset`.
+
+    Returns:
+      A `Select` of `Contact` ordered by `id`.
+    """
+    filters = contacts_filters(name, surname, email, cursor)
+    stmt = select(Contact).filter(and_(*filters)).order_by(Contact.id)
+    if not cursor:
+        stmt = stmt.offset(bindparam("offset", type_=Integer))
+    return stmt.limit(bindparam("limit", type_=Integer))
+
+
+@functools.cache
+def contacts_fields_statement(fields: tuple[str, ...], *flags: bool):
+    """
+    The function `contacts_fields_statement` returns `contacts_list_statement` for the filter
+    `flags`, prebuilt to select only the `fields` columns.
+    """
+    columns = [Contact.id] + [getattr(Contact, field) for field in fields]
+    return contacts_list_statement(*flags).with_only_columns(*columns)
+
+
+@functools.cache
+def contacts_total_statement(*flags: bool):
+    """
+    The function `contacts_total_statement` returns `contacts_list_statement` for the filter `flags`
+    with a `count(*) OVER ()` column named `total`.
+    """
+    return contacts_list_statement(*flags).add_columns(func.count().over().label("total"))
+
+
+@functools.cache
+def contacts_count_statement(name: bool, surname: bool, email: bool):
+    """
+    The function `contacts_count_statement` returns the prebuilt `COUNT` of the contacts matching
+    one combination of filters.
+    """
+    filters = contacts_filters(name, surname, email, False)
+    return select(func.count(Contact.id)).filter(and_(*filters))
+
+
+LEAN_FIELDS = ("id", "name", "surname", "email", "phone_number", "birthdate", "created_at")
+
+
+async def get_contacts_fields(
+    fields: list[str],
+    name: str,
+    surname: str,
+    email: str,
+    offset: int,
+    limit: int,
+    db: AsyncSession,
+    user: User,
+    cursor: str | None = None,
+):
+    """
+    The function `get_contacts_fields` returns the same page as `get_contacts` but selects only the
+    requested columns as plain rows: no ORM objects are built and the owner is not joined.
+
+    Args:
+      fields (list[str]): Names from `LEAN_FIELDS` to select. `id` is always included.
+      name (str): Optional substring of the contact name.
+      surname (str): Optional substring of the contact surname.
+      email (str): Optional substring of the contact email.
+      offset (int): The number of contacts to skip when no cursor is given.
+      limit (int): The page size.
+      db (AsyncSession): The database session used to run the query.
+      user (User): The owner of the contacts.
+      cursor (str | None): An opaque cursor from `encode_cursor`; it replaces `offset` if given.
+
+    Returns:
+      A list of dicts with the selected columns, ordered by `id`.
+    """
+    selected = tuple(field for field in LEAN_FIELDS if field in fields and field != "id")
+    stmt = contacts_fields_statement(
+        selected, bool(name), bool(surname), bool(email), cursor is not None
+    )
+    params = contacts_list_params(name, surname, email, offset, limit, user, cursor)
+    result = await execute_read(db, stmt, "contacts", user.id, params)
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def get_contacts_with_total(
+    name: str,
+    surname: str,
+    email: str,
+    offset: int,
+    limit: int,
+    db: AsyncSession,
+    user: User,
+    cursor: str | None = None,
+):
+    """
+    The function `get_contacts_with_total` returns a page of contacts like `get_contacts` together
+    with the number of matching contacts, computed in the same query with `count(*) OVER ()`.
+
+    The window is evaluated after `WHERE` but before `OFFSET`/`LIMIT`, so without a cursor it is the
+    total number of matching contacts. With a cursor it is the number of matches from the start of
+    this page to the end. Only an offset page requested past the end of the results, where there is
+    no row to carry the count, costs an extra `COUNT` query.
+
+    Args:
+      name (str): Optional substring of the contact name.
+      surname (str): Optional substring of the contact surname.
+      email (str): Optional substring of the contact email.
+      offset (int): The number of contacts to skip when no cursor is given.
+      limit (int): The page size.
+      db (AsyncSession): The database session used to run the query.
+      user (User): The owner of the contacts.
+      cursor (str | None): An opaque cursor from `encode_cursor`; it replaces `offset` if given.
+
+    Returns:
+      A tuple of the list of contacts and the count described above.
+    """
+    flags = (bool(name), bool(surname), bool(email))
+    stmt = contacts_total_statement(*flags, cursor is not None)
+    params = contacts_list_params(name, surname, email, offset, limit, user, cursor)
+    result = await execute_read(db, stmt, "contacts", user.id, params)
+    rows = result.all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total
+    if cursor is not None or offset == 0:
+        return [], 0
+    result = await execute_read(db, contacts_count_statement(*flags), "contacts", user.id, params)
+    return [], result.scalar_one()
+
+
+def is_postgresql(db: AsyncSession) -> bool:
+    """
+    The function `is_postgresql` tells whether the session is bound to PostgreSQL, where the
+    `pg_trgm` functions and indexes are available.
+
+    Args:
+      db (AsyncSession): The database session to inspect.
+
+    Returns:
+      `True` for a PostgreSQL bind, `False` otherwise (for example SQLite in tests).
+    """
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def search_contacts(q: str, offset: int, limit: int, db: AsyncSession, user: User):
+    """
+    The function `search_contacts` finds the user's contacts whose name, surname or email contains
+    the query string and returns them ranked by relevance.
+
+    On PostgreSQL the substring match is served by the `pg_trgm` GIN indexes on the three columns and
+    the results are ordered by the best trigram `similarity` of any column. Other databases fall back
+    to plain `LIKE` matching ranked by exact, prefix and substring matches.
+
+    Args:
+      q (str): The text to look for. `%` and `_` are matched literally.
+      offset (int): The number of ranked results to skip.
+      limit (int): The maximum number of contacts to return.
+      db (AsyncSession): The database session used to run the query.
+      user (User): The owner of the contacts to search.
+
+    Returns:
+      A list of matching `Contact` objects, most relevant first.
+    """
+    columns = (Contact.name, Contact.surname, Contact.email)
+    matches = or_(*(column.icontains(q, autoescape=True) for column in columns))
+    if is_postgresql(db):
+        rank = func.greatest(*(func.similarity(column, q) for column in columns))
+    else:
+        needle = q.lower()
+        rank = func.max(
+            *(
+                case(
+                    (func.lower(column) == needle, 3),
+                    (func.lower(column).startswith(needle, autoescape=True), 2),
+                    else_=1,
+                )
+                for column in columns
+            )
+        )
+    stmt = (
+        select(Contact)
+        .filter(and_(matches, Contact.user == user))
+        .order_by(rank.desc(), Contact.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    contacts = await execute_read(db, stmt, "contacts", user.id)
     return contacts.scalars().all()
 
 
+EXPORT_COLUMNS = (
+    Contact.id,
+    Contact.name,
+    Contact.surname,
+    Contact.email,
+    Contact.phone_number,
+    Contact.birthdate,
+    Contact.created_at,
+)
+
+
+async def stream_contacts(db: AsyncSession, user: User, chunk_size: int = 500):
+    """
+    The function `stream_contacts` iterates over all contacts of a user through a server-side cursor,
+    yielding them in chunks of plain rows.
+
+    Only the exported columns are selected, so no ORM objects are built and the owner is not joined.
+    Memory use is bounded by `chunk_size` no matter how large the address book is.
+
+    Args:
+      db (AsyncSession): The database session used to open the cursor.
+      user (User): The owner of the contacts.
+      chunk_size (int): The number of rows fetched from the cursor at a time.
+
+    Returns:
+      An async iterator of lists of rows with the columns of `EXPORT_COLUMNS`, ordered by `id`.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+CONTACT_BY_ID = select(Contact).filter(
+    and_(Contact.id == bindparam("contact_id"), Contact.user_id == bindparam("user_id"))
+)
+
+
 async def get_contact(contact_id: int, db: AsyncSession, user: User):
     """
     This Python async function retrieves a contact from the database based on the contact ID and user.
@@ -84,11 +444,38 @@ async def get_contact(contact_id: int, db: AsyncSession, user: User):
     `scalar_one_or_none()` method, which will return either the single result found or `None` if no
     matching contact is found.
     """
-    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
-    contact = await db.execute(stmt)
+    params = {"contact_id": contact_id, "user_id": user.id}
+    contact = await execute_read(db, CONTACT_BY_ID, "contacts", user.id, params)
     return contact.scalar_one_or_none()
 
 
+async def get_contacts_by_ids(contact_ids: list[int], db: AsyncSession, user: User):
+    """
+    The function `get_contacts_by_ids` loads several contacts of a user in one query, with the same
+    ownership check as `get_contact`.
+
+    On PostgreSQL the ids are sent as a single array parameter (`id = ANY(:ids)`), so the statement
+    and its plan are the same for any number of ids. Other databases use an expanding `IN`.
+
+    Args:
+      contact_ids (list[int]): The ids to load.
+      db (AsyncSession): The database session used to run the query.
+      user (User): The owner of the contacts. Ids of other users' contacts are not returned.
+
+    Returns:
+      A list of the found `Contact` objects in no particular order.
+    """
+    if not contact_ids:
+        return []
+    if is_postgresql(db):
+        ids_filter = Contact.id == any_(bindparam("ids", contact_ids, type_=ARRAY(Integer)))
+    else:
+        ids_filter = Contact.id.in_(contact_ids)
+    stmt = select(Contact).filter(and_(ids_filter, Contact.user == user))
+    contacts = await db.execute(stmt)
+    return contacts.scalars().all()
+
+
 async def create_contact(body: ContactShema, db: AsyncSession, user: User):
     """
     This Python function creates a new contact record in a database using the provided data and user
@@ -114,6 +501,47 @@ async def create_contact(body: ContactShema, db: AsyncSession, user: User):
     return contact
 
 
+async def bulk_create_contacts(
+    bodies: list[ContactShema], db: AsyncSession, user_id: int
+) -> set[str]:
+    """
+    The function `bulk_create_contacts` inserts many contacts with a single multi-row
+    `INSERT ... ON CONFLICT (phone_number) DO NOTHING` statement and commits them in one transaction.
+
+    Args:
+      bodies (list[ContactShema]): The validated contacts to insert.
+      db (AsyncSession): The database session used to run the statement.
+      user_id (int): The `id` of the owner of the new contacts. An id is taken instead of a `User`
+    because the commit expires the user loaded in the same session, and callers insert several chunks
+    in a row.
+
+    Returns:
+      The set of phone numbers that were actually inserted. Rows whose phone number already exists
+    are skipped and are missing from the set.
+    """
+    if not bodies:
+        return set()
+    dialect = postgresql if is_postgresql(db) else sqlite
+    rows = [
+        {
+            **body.model_dump(),
+            "birthday_key": birthday_key(body.birthdate),
+            "user_id": user_id,
+        }
+        for body in bodies
+    ]
+    stmt = (
+        dialect.insert(Contact)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Contact.phone_number])
+        .returning(Contact.phone_number)
+    )
+    result = await db.execute(stmt)
+    inserted = set(result.scalars().all())
+    await db.commit()
+    return inserted
+
+
 async def update_contact(
     contact_id: int, body: ContactShema, db: AsyncSession, user: User
 ):
@@ -138,19 +566,21 @@ async def update_contact(
     
     Returns:
       The `update_contact` function is returning the updated contact object after updating its
-    attributes with the values provided in the `body` parameter.
+    attributes with the values provided in the `body` parameter, or `None` if the user has no contact
+    with this id. The row is changed and read back with a single `UPDATE ... RETURNING` statement.
     """
-    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
+    stmt = (
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == user.id)
+        .values(**body.model_dump(), birthday_key=birthday_key(body.birthdate))
+        .returning(Contact)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
     result = await db.execute(stmt)
     contact = result.scalar_one_or_none()
+    await db.commit()
     if contact:
-        contact.name = body.name
-        contact.surname = body.surname
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.birthdate = body.birthdate
-        await db.commit()
-        await db.refresh(contact)
+        set_committed_value(contact, "user", user)
     return contact
 
 
@@ -171,20 +601,97 @@ async def delete_contact(contact_id: int, db: AsyncSession, user: User):
     contact.
     
     Returns:
-      The function `delete_contact` returns the deleted contact if it exists, otherwise it returns
-    `None`.
+      The function `delete_contact` returns the `id` of the deleted contact if it existed, otherwise
+    it returns `None`. The row is removed with a single `DELETE ... RETURNING` statement.
     """
-    
-    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user == user))
+    stmt = (
+        delete(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == user.id)
+        .returning(Contact.id)
+        .execution_options(synchronize_session=False)
+    )
     result = await db.execute(stmt)
-    contact = result.scalar_one_or_none()
-    if contact:
-        await db.delete(contact)
-        await db.commit()
-    return contact
+    deleted_id = result.scalar_one_or_none()
+    await db.commit()
+    return deleted_id
+
+
+def birthday_window(today, days: int):
+    """
+    The function `birthday_window` builds the filter matching contacts whose birthday falls within
+    `days` days starting from `today`, using the indexed `Contact.birthday_key` column.
+
+    When the window crosses the end of the year (for example December 28 plus 7 days) the range is
+    split into two halves joined with `OR`, so both ends are still served by the index.
+
+    Args:
+      today (date): The first day of the window.
+      days (int): The length of the window in days, today included as day 0.
+
+    Returns:
+      A SQLAlchemy boolean clause for `Contact.birthday_key`.
+    """
+    start = birthday_key(today)
+    end_date = today + timedelta(days=days)
+    end = birthday_key(end_date)
+    if end_date.year == today.year:
+        return Contact.birthday_key.between(start, end)
+    if end >= start:
+        return Contact.birthday_key.isnot(None)
+    return or_(Contact.birthday_key >= start, Contact.birthday_key <= end)
+
 
+DIGEST_COLUMNS = (
+    Contact.user_id,
+    User.email.label("owner_email"),
+    User.username.label("owner_username"),
+    Contact.name,
+    Contact.surname,
+    Contact.phone_number,
+    Contact.birthdate,
+)
 
-async def get_birthdays_soon(offset: int, limit: int, db: AsyncSession, user: User):
+
+async def stream_upcoming_birthdays(
+    db: AsyncSession, today, days: int = 7, chunk_size: int = 5000
+):
+    """
+    The function `stream_upcoming_birthdays` iterates over the upcoming birthdays of all users in one
+    query, through a server-side cursor.
+
+    The window is matched on `ix_contacts_birthday_key_user_id` and rows come ordered by owner, so a
+    caller can group them per user while reading. Only the digest columns are selected and no ORM
+    objects are built; memory use is bounded by `chunk_size`.
+
+    Args:
+      db (AsyncSession): The database session used to open the cursor.
+      today (date): The first day of the window.
+      days (int): The length of the window in days.
+      chunk_size (int): The number of rows fetched from the cursor at a time.
+
+    Returns:
+      An async iterator of lists of rows with the columns of `DIGEST_COLUMNS`.
+    """
+    stmt = (
+        select(*DIGEST_COLUMNS)
+        .join(User, Contact.user_id == User.id)
+        .filter(birthday_window(today, days))
+        .order_by(Contact.user_id, Contact.birthday_key)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def get_birthdays_soon(
+    offset: int,
+    limit: int,
+    db: AsyncSession,
+    user: User,
+    cursor: str | None = None,
+    days: int = 7,
+):
     """
     This function retrieves upcoming birthdays of contacts within a specified timeframe for a given user
     from a database session asynchronously.
@@ -202,29 +709,25 @@ async def get_birthdays_soon(offset: int, limit: int, db: AsyncSession, user: Us
       user (User): The `user` parameter in the function `get_birthdays_soon` is of type `User`. It is
     used to filter contacts based on the user to whom they belong. This parameter helps in retrieving
     contacts whose birthdays are coming up soon for a specific user.
+      cursor (str | None): An opaque cursor produced by `encode_cursor`. When it is given, `offset`
+    is ignored and the page starts right after the contact the cursor points to.
+      days (int): The size of the window in days. The window may span a month or a year boundary.
     
     Returns:
       The function `get_birthdays_soon` returns a list of contacts whose birthdays fall within the next
-    7 days starting from today's date. The contacts are filtered based on the provided `user` parameter
+    `days` days starting from today's date. The contacts are filtered based on the provided `user` parameter
     and are retrieved from the database using the provided `db` AsyncSession. The function returns the
     list of contacts that meet the specified criteria.
     """
     
     today = datetime.today()
-    stmt = (
-        select(Contact)
-        .filter(
-            and_(
-                func.date_part("month", Contact.birthdate) == today.month,
-                func.date_part("day", Contact.birthdate) >= today.day,
-                func.date_part("day", Contact.birthdate)
-                <= (today + timedelta(days=7)).day,
-                Contact.user == user
-            )
-        )
-        .offset(offset)
-        .limit(limit)
-    )
-    result = await db.execute(stmt)
+    filters = [birthday_window(today, days), Contact.user == user]
+    if cursor is not None:
+        filters.append(Contact.id > decode_cursor(cursor))
+    stmt = select(Contact).filter(and_(*filters)).order_by(Contact.id)
+    if cursor is None:
+        stmt = stmt.offset(offset)
+    stmt = stmt.limit(limit)
+    result = await execute_read(db, stmt, "contacts", user.id)
     contacts = result.scalars().all()
     return contacts
@@ -1,12 +1,14 @@
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
-from src.database.db import get_db
+from src.database.db import execute_read, get_db
 from src.entity.models import User
 from src.schemas.users import UserShema
 
+USER_BY_EMAIL = select(User).filter(User.email == bindparam("email"))
+
 async def create_user(body: UserShema, db:AsyncSession = Depends(get_db)):
     """
     The function `create_user` creates a new user in a database with an optional Gravatar avatar based
@@ -53,6 +55,20 @@ async def update_token(user:User, token:str|None, db:AsyncSession):
     user.refresh_token = token
     await db.commit()
     
+async def update_password(user: User, password: str, db: AsyncSession):
+    """
+    This Python async function stores a new password hash for a user, e.g. after a rehash with a
+    different bcrypt cost.
+    
+    Args:
+      user (User): The user whose password hash changes.
+      password (str): The new password hash.
+      db (AsyncSession): The database session the change is committed with.
+    """
+    
+    user.password = password
+    await db.commit()
+    
 async def get_user_by_email(email:str, db:AsyncSession = Depends(get_db)):
     """
     The function `get_user_by_email` retrieves a user from the database based on their email address.
@@ -71,11 +87,26 @@ async def get_user_by_email(email:str, db:AsyncSession = Depends(get_db)):
     found with the given email, the function will return `None`.
     """
     
-    stmt = select(User).filter(User.email == email)
-    user = await db.execute(stmt)
+    user = await execute_read(db, USER_BY_EMAIL, "user", email, {"email": email})
     user = user.scalar_one_or_none()
     return user
 
+async def get_avatar(user_id: int, db: AsyncSession) -> str | None:
+    """
+    This async function reads only the avatar URL of a user.
+    
+    Args:
+      user_id (int): The id of the user.
+      db (AsyncSession): The database session the query runs in.
+    
+    Returns:
+      The avatar URL, or `None` if the user does not exist or has no avatar.
+    """
+    
+    stmt = select(User.avatar).filter(User.id == user_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
 async def update_avatar(email, url: str, db: AsyncSession) -> User:
     """
     This async function updates the avatar URL for a user in a database based on their email.
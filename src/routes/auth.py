@@ -1,7 +1,7 @@
+import logging
 from typing import Optional
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Request,
     status,
     Depends,
@@ -15,14 +15,18 @@ from fastapi.security import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_limiter.depends import RateLimiter
+from redis.exceptions import RedisError
 
 from src.schemas.users import *
 from src.repository import users as repository_users
 from src.database.db import get_db
 from src.services.auth import auth_service
 from src.services.email import send_email
+from src.services.passwords import password_service
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 get_refresh_token = HTTPBearer()
 
@@ -35,23 +39,18 @@ get_refresh_token = HTTPBearer()
 )
 async def signup(
     body: UserShema,
-    bt: BackgroundTasks,
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
-    The `signup` function checks if a user already exists by email, creates a new user if not, and sends
-    a confirmation email.
+    The `signup` function checks if a user already exists by email, creates a new user if not, and queues
+    a confirmation email in the outbox.
     
     Args:
       body (UserShema): The `body` parameter in the `signup` function represents the data of the user
     that is being signed up. It is expected to be of type `UserSchema`, which likely contains
     information such as the user's email, password, and other relevant details needed for creating a new
     user account.
-      bt (BackgroundTasks): BackgroundTasks is a class provided by FastAPI that allows you to schedule
-    background tasks to be run after a response is returned to the client. In the provided code snippet,
-    the `bt` parameter is an instance of the BackgroundTasks class that is used to schedule the
-    `send_email` task to be
       request (Request): The `request` parameter in the `signup` function is of type `Request`. It is
     used to access information about the incoming HTTP request, such as headers, cookies, and query
     parameters. In this context, it is being used to access the base URL of the incoming request using
@@ -70,9 +69,14 @@ async def signup(
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await password_service.hash(body.password)
     new_user = await repository_users.create_user(body, db)
-    bt.add_task(send_email, new_user.email, new_user.username, request.base_url)
+    await auth_service.forget_user(new_user.email)
+    try:
+        await send_email(new_user.email, new_user.username, request.base_url)
+    except RedisError as err:
+        # the account exists already; the user can ask for the email again with request_email
+        logger.warning("Queueing the confirmation email of %s failed: %s", new_user.email, err)
     return new_user
 
 
@@ -111,14 +115,19 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed"
         )
-    if not auth_service.verify_password(body.password, user.password):
+    valid, new_hash = await password_service.verify_and_update(body.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
         )
+    # before any commit expires the loaded attributes
+    snapshot = UserSnapshot.model_validate(user)
+    if new_hash:
+        await repository_users.update_password(user, new_hash, db)
 
     access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await repository_users.update_token(user, refresh_token, db)
+    refresh_token = await auth_service.issue_refresh_token(user.email)
+    await auth_service.cache_user(snapshot)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -157,27 +166,24 @@ async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     await repository_users.confirmed_email(email, db)
+    await auth_service.forget_user(email)
     return {"message": "Email confirmed"}
 
 
 @router.post("/refresh_token", response_model=TokenShema)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     This Python async function refreshes a user's access token and refresh token based on a provided
-    refresh token.
+    refresh token. The refresh token is checked and rotated in the Redis token store, without a
+    database query; a refresh token that was already used ends all sessions of its owner.
     
     Args:
       credentials (HTTPAuthorizationCredentials): The `credentials` parameter in the `refresh_token`
     function is of type `HTTPAuthorizationCredentials` and is obtained by calling the
     `get_refresh_token` dependency. It represents the authorization credentials (token) provided in the
     request header for refreshing the access token.
-      db (AsyncSession): The `db` parameter in the `refresh_token` function is an AsyncSession
-    dependency that represents the database session used for database operations within the function. It
-    is obtained through the `get_db` dependency injection. This parameter allows the function to
-    interact with the database asynchronously to perform operations such as retrieving user
     
     Returns:
       The `refresh_token` function returns a dictionary containing the following keys and values:
@@ -185,18 +191,8 @@ async def refresh_token(
     - "refresh_token": the newly created refresh token
     - "token_type": "bearer"
     """
-    token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, db)
-    if user.email != email:
-        await repository_users.update_token(user, None, db)
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
-        )
-
+    email, refresh_token = await auth_service.rotate_refresh_token(credentials.credentials)
     access_token = await auth_service.create_access_token({"sub": email})
-    refresh_token = await auth_service.create_refresh_token({"sub": email})
-    await repository_users.update_token(user, refresh_token, db)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -204,10 +200,24 @@ async def refresh_token(
     }
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    everywhere: bool = Query(False),
+    credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
+):
+    """
+    This function revokes the refresh token it is called with, so it can no longer be exchanged.
+    
+    Args:
+      everywhere (bool): Revoke every refresh token of the user, ending the sessions on all devices.
+      credentials (HTTPAuthorizationCredentials): The refresh token from the `Authorization` header.
+    """
+    await auth_service.revoke_refresh_token(credentials.credentials, everywhere)
+
+
 @router.post("/request_email")
 async def request_email(
     body: RequestEmail,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
@@ -218,10 +228,6 @@ async def request_email(
     Args:
       body (RequestEmail): `RequestEmail` - a data model representing the request body containing an
     email address.
-      background_tasks (BackgroundTasks): The `background_tasks` parameter in the `request_email`
-    function is used to add tasks that should be run in the background. In this case, the function is
-    adding a task to send an email for email confirmation in the background. This allows the function to
-    return a response to the user without waiting
       request (Request): The `request` parameter in the `request_email` function is of type `Request`.
     It is used to access information related to the incoming HTTP request such as headers, cookies,
     query parameters, and more. In this function, the `request` parameter is not directly used, but it
@@ -234,7 +240,7 @@ async def request_email(
     Returns:
       The function `request_email` returns a message based on the conditions checked in the code. If the
     user's email is already confirmed, it returns a message saying "Your email is already confirmed". If
-    the user is found and their email is not confirmed, it adds a task to send an email for confirmation
+    the user is found and their email is not confirmed, it queues an email for confirmation in the outbox
     and returns a message saying "Check your email for confirmation."
     """
     user = await repository_users.get_user_by_email(body.email, db)
@@ -242,7 +248,8 @@ async def request_email(
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(
-            send_email, user.email, user.username, request.base_url
-        )
+        try:
+            await send_email(user.email, user.username, request.base_url)
+        except RedisError as err:
+            logger.warning("Queueing the confirmation email of %s failed: %s", user.email, err)
     return {"message": "Check your email for confirmation."}
@@ -1,26 +1,63 @@
+from datetime import date
 from re import A
 from typing import Optional
-from fastapi import APIRouter, status, Depends, HTTPException, Query
+from fastapi import APIRouter, Request, Response, status, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.entity.models import User
-from src.schemas.contacts import ContactResponse, ContactShema
+from src.schemas.contacts import (
+    MAX_BATCH_IDS,
+    ContactBatchRequest,
+    ContactBatchResponse,
+    ContactFieldsResponse,
+    ContactResponse,
+    ContactShema,
+    ImportReport,
+)
 from src.repository import contacts as repository_contacts
-from src.database.db import get_db
+from src.database.db import get_db, get_session_factory
 from src.services.auth import auth_service
+from src.services.cache import contact_adapter, contact_list_adapter, contacts_cache
+from src.services.etag import not_modified
+from src.services.exporter import MEDIA_TYPES, export_contacts as export_contacts_service
+from src.services.importer import import_contacts as import_contacts_service
+from src.services.serialization import json_response
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
 
+def set_next_cursor(response: Response, contacts: list, limit: int):
+    """
+    The function `set_next_cursor` adds an `X-Next-Cursor` header pointing right after the last
+    contact of a full page, so clients can switch from offset to keyset pagination at any page.
+
+    :param response: The outgoing response the header is written to
+    :type response: Response
+    :param contacts: The contacts returned for the current page
+    :type contacts: list
+    :param limit: The requested page size. A shorter page means there is nothing left to fetch
+    :type limit: int
+    """
+    if contacts and len(contacts) == limit:
+        response.headers["X-Next-Cursor"] = repository_contacts.encode_cursor(
+            contacts[-1].id
+        )
+
+
 @router.get(
     "/birthdays-soon",
     response_model=list[ContactResponse],
     dependencies=[Depends(RateLimiter(times=5, seconds=20))],
 )
 async def get_birthdays_soon(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0),
     limit: int = Query(10, ge=10, lt=500),
+    cursor: Optional[str] = None,
+    days: int = Query(7, ge=1, le=365),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
@@ -29,6 +66,9 @@ async def get_birthdays_soon(
     and limit parameters, while also requiring database access and authentication of the current user.
     
     Args:
+      request (Request): The incoming request, checked for `If-None-Match`.
+      response (Response): The outgoing response, used to return the `ETag` and `X-Next-Cursor`
+    headers.
       offset (int): The `offset` parameter is used to specify the starting point from which to retrieve
     birthdays. It indicates the number of records to skip before starting to return results. In the
     provided code snippet, the `offset` parameter has a default value of 0 and must be a non-negative
@@ -36,6 +76,10 @@ async def get_birthdays_soon(
       limit (int): The `limit` parameter in the `get_birthdays_soon` function specifies the maximum
     number of birthdays to retrieve. By default, it is set to 10, and it must be greater than or equal
     to 10 and less than 500. This means that the function will return a maximum
+      cursor (Optional[str]): The value of the `X-Next-Cursor` header from the previous page. When
+    it is given, `offset` is ignored and the page is fetched by keyset pagination.
+      days (int): The number of days ahead to look for birthdays, 7 by default. The window may cross
+    a month or a year boundary.
       db (AsyncSession): The `db` parameter in the function `get_birthdays_soon` is of type
     `AsyncSession` and is obtained by calling the `get_db` dependency. This parameter is used to
     interact with the database asynchronously within the function.
@@ -49,10 +93,64 @@ async def get_birthdays_soon(
     The contacts are retrieved from the database using the `repository_contacts.get_birthdays_soon`
     method with the provided offset, limit, database session (`db`), and current user information.
     """
-    contacts = await repository_contacts.get_birthdays_soon(
-        offset, limit, db, current_user
+    params = {
+        "today": date.today(),
+        "days": days,
+        "offset": offset,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    etag = await contacts_cache.etag(current_user.id, "birthdays", params)
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    try:
+        contacts = await contacts_cache.get_or_load(
+            current_user.id,
+            "birthdays",
+            params,
+            lambda: repository_contacts.get_birthdays_soon(
+                offset, limit, db, current_user, cursor=cursor, days=days
+            ),
+            contact_list_adapter,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    set_next_cursor(response, contacts, limit)
+    return json_response(contacts, contact_list_adapter, response)
+
+
+@router.get(
+    "/search",
+    response_model=list[ContactResponse],
+    dependencies=[Depends(RateLimiter(times=5, seconds=20))],
+)
+async def search_contacts(
+    q: str = Query(min_length=1, max_length=100),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=10, lt=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `search_contacts` function looks for the query string in the name, surname and email of the
+    current user's contacts at once and returns the matches ranked by similarity.
+
+    Args:
+      q (str): The text to search for in any of the three fields.
+      offset (int): The number of ranked results to skip.
+      limit (int): The maximum number of contacts to return, from 10 to 499.
+      db (AsyncSession): The database session obtained from the `get_db` dependency.
+      current_user (User): The authenticated user whose contacts are searched.
+
+    Returns:
+      A list of contacts, most relevant first.
+    """
+    contacts = await repository_contacts.search_contacts(
+        q, offset, limit, db, current_user
     )
-    return contacts
+    return json_response(contacts, contact_list_adapter)
 
 
 @router.get(
@@ -61,11 +159,15 @@ async def get_birthdays_soon(
     dependencies=[Depends(RateLimiter(times=5, seconds=20))],
 )
 async def get_contacts(
+    request: Request,
+    response: Response,
     name: Optional[str] = None,
     surname: Optional[str] = None,
     email: Optional[str] = None,
     offset: int = Query(0, ge=0),
     limit: int = Query(10, ge=10, lt=500),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
@@ -74,6 +176,9 @@ async def get_contacts(
     Python.
     
     Args:
+      request (Request): The incoming request, checked for `If-None-Match`.
+      response (Response): The outgoing response, used to return the `ETag` and `X-Next-Cursor`
+    headers.
       name (Optional[str]): The `name` parameter in the `get_contacts` function is an optional string
     parameter used to filter contacts by their name. If a `name` value is provided, only contacts with
     that specific name will be retrieved. If `name` is not provided (None), the function will not filter
@@ -93,6 +198,12 @@ async def get_contacts(
       limit (int): The `limit` parameter in the `get_contacts` function specifies the maximum number of
     contacts that should be returned in a single query. By default, the `limit` is set to 10, but it
     must be greater than or equal to 10 and less than 500. This means that
+      cursor (Optional[str]): The value of the `X-Next-Cursor` header from the previous page. When
+    it is given, `offset` is ignored and the next page is found by keyset pagination on the contact
+    `id`, so deep pages cost the same as the first one.
+      include_total (bool): When `True`, the number of matching contacts is returned in the
+    `X-Total-Count` header (offset mode) or the number of matches left from this page on in the
+    `X-Remaining-Count` header (cursor mode). It is computed in the same query as the page.
       db (AsyncSession): The `db` parameter in the `get_contacts` function is of type `AsyncSession` and
     is obtained as a dependency using the `get_db` function. This parameter represents the asynchronous
     database session that will be used to interact with the database when querying for contacts.
@@ -108,10 +219,222 @@ async def get_contacts(
     parameters and the database session (`db`) and the current user information (`current_user`). The
     retrieved contacts are then returned by the function
     """
-    contacts = await repository_contacts.get_contacts(
-        name, surname, email, offset, limit, db, current_user
+    params = {
+        "name": name,
+        "surname": surname,
+        "email": email,
+        "offset": offset,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    etag = await contacts_cache.etag(
+        current_user.id, "contacts", {**params, "include_total": include_total}
+    )
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    try:
+        if include_total:
+            contacts, total = await repository_contacts.get_contacts_with_total(
+                name, surname, email, offset, limit, db, current_user, cursor=cursor
+            )
+            header = "X-Remaining-Count" if cursor is not None else "X-Total-Count"
+            response.headers[header] = str(total)
+        else:
+            contacts = await contacts_cache.get_or_load(
+                current_user.id,
+                "contacts",
+                params,
+                lambda: repository_contacts.get_contacts(
+                    name, surname, email, offset, limit, db, current_user, cursor=cursor
+                ),
+                contact_list_adapter,
+            )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    set_next_cursor(response, contacts, limit)
+    return json_response(contacts, contact_list_adapter, response)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(RateLimiter(times=1, seconds=20))],
+)
+async def export_contacts(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    open_session=Depends(get_session_factory),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `export_contacts` function streams the whole address book of the current user as CSV or
+    NDJSON. Rows are read through a server-side cursor and sent chunk by chunk, so memory stays flat
+    and the first bytes go out before the last rows are read.
+
+    Args:
+      format (str): The output format, `ndjson` (default) or `csv` with a header row.
+      open_session: Opens the session the export reads from once the response has started, from
+    the `get_session_factory` dependency.
+      current_user (User): The authenticated user whose contacts are exported.
+
+    Returns:
+      A `StreamingResponse` with the exported contacts.
+    """
+    return StreamingResponse(
+        export_contacts_service(open_session, current_user, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="contacts.{format}"'
+        },
     )
-    return contacts
+
+
+@router.get(
+    "/lean",
+    response_model=ContactFieldsResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=20))],
+)
+async def get_contacts_lean(
+    response: Response,
+    fields: str = Query(
+        ",".join(repository_contacts.LEAN_FIELDS),
+        description="Comma-separated contact fields; add `user` to include the owner once",
+    ),
+    name: Optional[str] = None,
+    surname: Optional[str] = None,
+    email: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=10, lt=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `get_contacts_lean` function lists contacts like `get_contacts` but returns only the
+    requested fields. Only those columns are selected, the owner is not joined, and when `user` is
+    among the fields the owner appears once in the envelope instead of in every item.
+
+    Args:
+      response (Response): The outgoing response, used to return the `X-Next-Cursor` header.
+      fields (str): Comma-separated names from `id`, `name`, `surname`, `email`, `phone_number`,
+    `birthdate`, `created_at` and `user`. `id` is always returned.
+      name (Optional[str]): Optional substring of the contact name.
+      surname (Optional[str]): Optional substring of the contact surname.
+      email (Optional[str]): Optional substring of the contact email.
+      offset (int): The number of contacts to skip when no cursor is given.
+      limit (int): The page size, from 10 to 499.
+      cursor (Optional[str]): The `X-Next-Cursor` header of the previous page.
+      db (AsyncSession): The database session obtained from the `get_db` dependency.
+      current_user (User): The authenticated user whose contacts are listed.
+
+    Returns:
+      An envelope with the optional `owner` and the list of contacts with the selected fields.
+    """
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(requested) - set(repository_contacts.LEAN_FIELDS) - {"user"}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    try:
+        contacts = await repository_contacts.get_contacts_fields(
+            requested, name, surname, email, offset, limit, db, current_user, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if len(contacts) == limit:
+        response.headers["X-Next-Cursor"] = repository_contacts.encode_cursor(
+            contacts[-1]["id"]
+        )
+    return {
+        "owner": current_user if "user" in requested else None,
+        "contacts": contacts,
+    }
+
+
+async def load_batch(contact_ids: list[int], db: AsyncSession, user: User):
+    """
+    The function `load_batch` loads the requested contacts in one query and splits the ids into
+    found and missing ones.
+
+    :param contact_ids: The requested ids; duplicates are ignored
+    :type contact_ids: list[int]
+    :param db: The database session
+    :type db: AsyncSession
+    :param user: The owner of the contacts
+    :type user: User
+    :return: The found contacts in request order and the ids that don't exist or belong to
+    another user
+    """
+    contact_ids = list(dict.fromkeys(contact_ids))
+    found = {
+        contact.id: contact
+        for contact in await repository_contacts.get_contacts_by_ids(contact_ids, db, user)
+    }
+    return {
+        "contacts": [found[i] for i in contact_ids if i in found],
+        "missing": [i for i in contact_ids if i not in found],
+    }
+
+
+@router.get(
+    "/batch",
+    response_model=ContactBatchResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=20))],
+)
+async def get_contacts_batch(
+    ids: str = Query(pattern=r"^\d+(,\d+)*$", description="Comma-separated contact ids"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `get_contacts_batch` function returns up to `MAX_BATCH_IDS` contacts of the current user in
+    a single request and a single query, instead of one `GET /contacts/{contact_id}` per id.
+
+    Args:
+      ids (str): Comma-separated contact ids, e.g. `1,2,3`.
+      db (AsyncSession): The database session obtained from the `get_db` dependency.
+      current_user (User): The authenticated user who must own the contacts.
+
+    Returns:
+      The found contacts in request order and the list of missing ids.
+    """
+    contact_ids = [int(i) for i in ids.split(",")]
+    if len(contact_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_BATCH_IDS} ids can be requested at once",
+        )
+    return await load_batch(contact_ids, db, current_user)
+
+
+@router.post(
+    "/batch",
+    response_model=ContactBatchResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=20))],
+)
+async def post_contacts_batch(
+    body: ContactBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `post_contacts_batch` function is the `POST` variant of `get_contacts_batch` for clients
+    whose id lists don't fit comfortably into a query string.
+
+    Args:
+      body (ContactBatchRequest): The ids to load, at most `MAX_BATCH_IDS`.
+      db (AsyncSession): The database session obtained from the `get_db` dependency.
+      current_user (User): The authenticated user who must own the contacts.
+
+    Returns:
+      The found contacts in request order and the list of missing ids.
+    """
+    return await load_batch(body.ids, db, current_user)
 
 
 @router.get(
@@ -121,6 +444,8 @@ async def get_contacts(
 )
 async def get_contact(
     contact_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
@@ -131,6 +456,8 @@ async def get_contact(
     Args:
       contact_id (int): The `contact_id` parameter is an integer that represents the unique identifier
     of the contact you want to retrieve from the database.
+      request (Request): The incoming request, checked for `If-None-Match`.
+      response (Response): The outgoing response, used to return the `ETag` header.
       db (AsyncSession): The `db` parameter is an instance of an asynchronous database session
     (`AsyncSession`) that is used to interact with the database. It is obtained using the `get_db`
     dependency, which likely sets up the database connection for the request.
@@ -144,12 +471,22 @@ async def get_contact(
     provided. If the contact is not found in the database, it raises an HTTPException with a status code
     of 404 and the detail message "Contact not found".
     """
-    contact = await repository_contacts.get_contact(contact_id, db)
+    params = {"contact_id": contact_id}
+    etag = await contacts_cache.etag(current_user.id, "contact", params)
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    contact = await contacts_cache.get_or_load(
+        current_user.id,
+        "contact",
+        params,
+        lambda: repository_contacts.get_contact(contact_id, db, current_user),
+        contact_adapter,
+    )
     if not contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
-    return contact
+    return json_response(contact, contact_adapter, response)
 
 
 @router.post(
@@ -183,9 +520,48 @@ async def create_contact(
     :return: The function `create_contact` is returning the contact that was created in the database.
     """
     contact = await repository_contacts.create_contact(body, db, current_user)
+    await contacts_cache.invalidate(current_user.id)
     return contact
 
 
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    dependencies=[Depends(RateLimiter(times=1, seconds=20))],
+)
+async def import_contacts(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson|vcard)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    """
+    The `import_contacts` function imports an address book sent as the raw request body. The body is
+    read as a stream, validated row by row and inserted in chunked multi-row transactions, so a
+    file with tens of thousands of contacts never sits in memory as a whole.
+
+    Args:
+      request (Request): The incoming request whose body is the CSV, NDJSON or vCard file.
+      format (str): The format of the body: `csv` (with a header row), `ndjson` or `vcard`.
+      db (AsyncSession): The database session obtained from the `get_db` dependency.
+      current_user (User): The authenticated user who will own the imported contacts.
+
+    Returns:
+      An `ImportReport` with the number of received, imported and failed rows, an error for every
+    rejected row and the throughput of the import. Rows with a phone number that already exists are
+    reported instead of failing the whole file.
+    """
+    try:
+        report = await import_contacts_service(
+            request.stream(), format, db, current_user
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    if report.imported:
+        await contacts_cache.invalidate(current_user.id)
+    return report
+
+
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(
     body: ContactShema,
@@ -226,6 +602,7 @@ async def update_contact(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="contact not found"
         )
+    await contacts_cache.invalidate(current_user.id)
     return contact
 
 
@@ -254,4 +631,6 @@ async def delete_contact(
     deleting it from the database.
     """
     contact = await repository_contacts.delete_contact(contact_id, db, current_user)
+    if contact is not None:
+        await contacts_cache.invalidate(current_user.id)
     return contact
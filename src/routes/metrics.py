@@ -0,0 +1,45 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.services.auth import auth_service
+from src.services.cache import contacts_cache
+from src.services.passwords import password_service
+
+
+def verify_metrics_token(x_metrics_token: str | None = Header(None)):
+    """
+    The function `verify_metrics_token` lets only scrapers that send the `METRICS_TOKEN` setting in
+    the `X-Metrics-Token` header through. The endpoint answers 404 to everyone else, and to
+    everyone while no token is configured.
+    """
+    expected = config.METRICS_TOKEN
+    if not expected or x_metrics_token is None or not secrets.compare_digest(
+        x_metrics_token.encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/metrics", tags=["metrics"], dependencies=[Depends(verify_metrics_token)]
+)
+
+
+@router.get("/")
+async def get_metrics():
+    """
+    The function `get_metrics` returns the counters of this worker process: the database connection
+    pool with its checkout wait histogram, the password hashing pool and the caches. Each worker
+    answers for itself, so scrape every worker to size pools against real load.
+
+    Returns:
+      A dict of counters per component.
+    """
+    return {
+        "database": sessionmanager.stats(),
+        "passwords": password_service.stats(),
+        "principals": auth_service.principals.stats(),
+        "contacts_cache": contacts_cache.stats(),
+    }
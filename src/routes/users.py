@@ -1,17 +1,18 @@
-import pickle
+import asyncio
 
-import cloudinary
-import cloudinary.uploader
 from fastapi import (
     APIRouter,
     HTTPException,
     Depends,
+    Request,
+    Response,
     status,
     Path,
     Query,
     UploadFile,
     File,
 )
+from fastapi.responses import RedirectResponse
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -19,16 +20,21 @@ from src.database.db import get_db
 from src.entity.models import User
 from src.schemas.users import UserResponse
 from src.services.auth import auth_service
+from src.services.avatars import (
+    AVATAR_SIZE,
+    AVATAR_SIZES,
+    DIGEST_PATTERN,
+    avatar_response,
+    avatar_storage,
+    read_upload,
+    resize_variants,
+)
+from src.services.cache import contacts_cache
+from src.services.etag import content_etag, not_modified
 from src.conf.config import config
 from src.repository import users as repositories_users
 
 router = APIRouter(prefix="/users", tags=["users"])
-cloudinary.config(
-    cloud_name=config.CLOUDINARY_NAME,
-    api_key=config.CLOUDINARY_API_KEY,
-    api_secret=config.CLOUDINARY_API_SECRET,
-    secure=True,
-)
 
 
 @router.get(
@@ -36,11 +42,20 @@ cloudinary.config(
     response_model=UserResponse,
     dependencies=[Depends(RateLimiter(times=1, seconds=20))],
 )
-async def get_current_user(user: User = Depends(auth_service.get_current_user)):
+async def get_current_user(
+    request: Request,
+    response: Response,
+    user: User = Depends(auth_service.get_current_user),
+):
     """
     The function `get_current_user` returns the current user using dependency injection in Python's
-    FastAPI framework.
+    FastAPI framework. The response carries an `ETag` of the profile and a matching
+    `If-None-Match` is answered with `304 Not Modified` and no body.
     
+    :param request: The incoming request, checked for `If-None-Match`
+    :type request: Request
+    :param response: The outgoing response, used to return the `ETag` header
+    :type response: Response
     :param user: The `get_current_user` function is an asynchronous function that takes a parameter
     `user` of type `User`. The function uses the `Depends` function from FastAPI to retrieve the current
     user. The `get_current_user` function is likely a part of an authentication service that verifies
@@ -48,7 +63,11 @@ async def get_current_user(user: User = Depends(auth_service.get_current_user)):
     :type user: User
     :return: The `get_current_user` function is returning the current user object.
     """
-    return user
+    profile = UserResponse.model_validate(user)
+    etag = content_etag(profile.model_dump_json().encode())
+    if (cached := not_modified(request, response, etag)) is not None:
+        return cached
+    return profile
 
 
 @router.patch("/avatar", response_model=UserResponse)
@@ -58,8 +77,10 @@ async def update_avatar_user(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    This Python async function updates the avatar of a user by uploading a file to Cloudinary and
-    updating the user's avatar URL in the database.
+    This Python async function updates the avatar of a user by resizing the uploaded image to every
+    size in `AVATAR_SIZES` in a worker thread, storing it with the configured avatar storage (Cloudinary or the local
+    filesystem) and updating the user's avatar URL in the database. Files larger than
+    `AVATAR_MAX_BYTES` are rejected with 413 and files that are not images with 400.
     
     :param file: The `file` parameter in the `update_avatar_user` function is of type `UploadFile` and
     is set to a default value of `File()`. This parameter is used to receive the uploaded file (avatar
@@ -77,11 +98,61 @@ async def update_avatar_user(
     :return: The function `update_avatar_user` returns the updated user object after updating the avatar
     image URL in the database.
     """
-    r = cloudinary.uploader.upload(
-        file.file, public_id=f"RestAPI/{current_user.username}", overwrite=True
-    )
-    src_url = cloudinary.CloudinaryImage(f"RestAPI/{current_user.username}").build_url(
-        width=250, height=250, crop="fill", version=r.get("version")
-    )
+    data = await read_upload(file, config.AVATAR_MAX_BYTES)
+    try:
+        variants = await asyncio.to_thread(resize_variants, data)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    src_url = await avatar_storage.save(current_user, variants)
     user = await repositories_users.update_avatar(current_user.email, src_url, db)
+    await auth_service.forget_user(user.email)
+    # every cached contact read embeds its owner, avatar included
+    await contacts_cache.invalidate(user.id)
     return user
+
+
+@router.get("/{user_id}/avatar", response_class=Response)
+async def get_avatar(
+    request: Request,
+    user_id: int = Path(ge=1),
+    size: int = Query(AVATAR_SIZE),
+    v: str | None = Query(None, pattern=DIGEST_PATTERN),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The function `get_avatar` serves a user's avatar in one of the `AVATAR_SIZES`.
+
+    A URL with the content digest `v`, as stored in the user's `avatar`, is served straight from
+    disk without touching the database and is cached by clients as immutable. Without `v` the
+    current avatar is looked up and served for revalidation. Avatars kept elsewhere, e.g. on
+    Gravatar or Cloudinary, are redirected to.
+
+    Args:
+      request (Request): The incoming request, checked for `If-None-Match`.
+      user_id (int): The id of the user.
+      size (int): The side of the avatar in pixels.
+      v (str | None): The content digest of the avatar.
+      db (AsyncSession): The database session, used only when `v` is missing or unknown.
+
+    Returns:
+      The PNG file, `304 Not Modified`, or a redirect to an external avatar.
+    """
+    if size not in AVATAR_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Size must be one of {', '.join(map(str, AVATAR_SIZES))}",
+        )
+    found = avatar_storage.find(v, size) if v else None
+    immutable = found is not None
+    if found is None:
+        url = await repositories_users.get_avatar(user_id, db)
+        if url is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+        v = avatar_storage.digest(url)
+        if v is None:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        found = avatar_storage.find(v, size)
+        if found is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    path, stat = found
+    return avatar_response(request, path, stat, v, size, immutable)
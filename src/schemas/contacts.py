@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 from src.schemas.users import UserResponse
@@ -18,4 +20,35 @@ class ContactResponse(ContactShema):
     
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ContactFieldsResponse(BaseModel):
+    owner: UserResponse | None = None
+    contacts: list[dict[str, Any]]
+
+
+MAX_BATCH_IDS = 100
+
+
+class ContactBatchRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class ContactBatchResponse(BaseModel):
+    contacts: list[ContactResponse]
+    missing: list[int]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    received: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
+    elapsed: float = 0.0
+    rows_per_second: float = 0.0
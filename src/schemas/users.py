@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 class UserShema(BaseModel):
     username: str = Field(min_length=3, max_length=25)
@@ -10,11 +12,28 @@ class UserResponse(BaseModel):
     id: int = Field(primary_key=True, default=1)
     username: str
     email: str
+    avatar: str | None = None
     
     class Config:
         from_attributes = True
 
 
+class UserSnapshot(BaseModel):
+    """
+    The cached part of a `User`: what requests read from the current user, without the password
+    hash and the refresh token.
+    """
+    id: int
+    username: str | None = None
+    email: str
+    avatar: str | None = None
+    confirmed: bool | None = False
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class TokenShema(BaseModel):
     access_token: str
     refresh_token: str
@@ -1,26 +1,149 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import pickle
 from typing import Optional
-import redis
+from uuid import uuid4
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+from sqlalchemy.orm import make_transient_to_detached
 
 
 from src.database.db import get_db
 from src.repository import users as repository_users
 from src.conf.config import config
+from src.entity.models import User
+from src.schemas.users import UserSnapshot
+from src.services.cache import redis_client
+from src.services.invalidation import invalidation_bus
+from src.services.passwords import password_service
+from src.services.tokens import RefreshTokenStore
+
+logger = logging.getLogger(__name__)
+
+USER_SNAPSHOT_VERSION = 1
+
+
+def snapshot_to_user(snapshot: UserSnapshot) -> User:
+    """
+    The function `snapshot_to_user` rebuilds a detached `User` with its primary key set, so it can
+    be used in filters and relationships of the request session without being inserted again.
+    """
+    user = User(**snapshot.model_dump())
+    make_transient_to_detached(user)
+    return user
+
+
+class PrincipalCache:
+    """
+    Bounded in-process LRU of authenticated principals, keyed by a digest of the access token.
+
+    An entry holds the user snapshot the token resolved to and lives for at most ``ttl`` seconds,
+    never past the token's own ``exp``. A hit skips both ``jwt.decode`` and the Redis lookup.
+    Every hit builds a fresh ``User`` so concurrent requests never share an ORM instance.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, UserSnapshot]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> User | None:
+        """
+        The function `get` returns the user of a token validated earlier, or `None` on a miss.
+
+        :param token: The raw access token
+        :type token: str
+        :return: A detached user rebuilt from the cached snapshot
+        """
+        if self.maxsize <= 0:
+            return None
+        key = self.token_key(token)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return snapshot_to_user(entry[1])
+
+    def put(self, token: str, exp: float, snapshot: UserSnapshot):
+        """
+        The function `put` remembers the principal of a validated token, evicting the least
+        recently used entry when the cache is full.
+
+        :param token: The raw access token
+        :type token: str
+        :param exp: The `exp` claim of the token, in seconds since the epoch
+        :type exp: float
+        :param snapshot: The user the token resolved to
+        :type snapshot: UserSnapshot
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = min(time.time() + self.ttl, exp)
+        key = self.token_key(token)
+        self.entries[key] = (expires_at, snapshot)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def forget(self, email: str):
+        """
+        The function `forget` drops every cached token of a user, e.g. after the user has changed.
+
+        :param email: The email of the changed user
+        :type email: str
+        """
+        for key in [key for key, (_, snapshot) in self.entries.items() if snapshot.email == email]:
+            del self.entries[key]
+
+    def invalidate(self, email: str | None):
+        """
+        The function `invalidate` handles `user` events of the invalidation bus. `None` means
+        events may have been missed and drops every entry.
+        """
+        if email is None:
+            self.entries.clear()
+        else:
+            self.forget(email)
+
+    def stats(self) -> dict:
+        """
+        The function `stats` returns the size, hit and miss counters of this process.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = password_service.context
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
 
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
-    r = redis.Redis()
+    r = redis_client
+    user_ttl = config.CACHE_USER_TTL
+    principals = PrincipalCache(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL)
+    refresh_tokens = RefreshTokenStore(redis_client, config.REFRESH_TOKEN_TTL)
 
     def verify_password(self, plain_password, hashed_password):
         """
@@ -131,13 +254,22 @@ class Auth:
         scope for token". If there is an error decoding the token (JWTError), it raises an HTTPException
         with a status code
         """
+        return self.refresh_token_payload(refresh_token)["sub"]
+
+    def refresh_token_payload(self, refresh_token: str) -> dict:
+        """
+        The function `refresh_token_payload` decodes a refresh token and checks its scope.
+
+        :param refresh_token: The encoded refresh token
+        :type refresh_token: str
+        :return: The claims of the token
+        """
         try:
             payload = jwt.decode(
                 refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM]
             )
             if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return email
+                return payload
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid scope for token",
@@ -148,6 +280,60 @@ class Auth:
                 detail="Could not validate credentials",
             )
 
+    async def issue_refresh_token(self, email: str) -> str:
+        """
+        The function `issue_refresh_token` creates a refresh token with a fresh token id (`jti`) and
+        registers it in the refresh token store for the lifetime of the token.
+
+        :param email: The owner of the token
+        :type email: str
+        :return: The encoded refresh token
+        """
+        jti = uuid4().hex
+        token = await self.create_refresh_token(
+            {"sub": email, "jti": jti}, expires_delta=self.refresh_tokens.ttl
+        )
+        await self.refresh_tokens.add(jti, email)
+        return token
+
+    async def rotate_refresh_token(self, refresh_token: str) -> tuple[str, str]:
+        """
+        The function `rotate_refresh_token` exchanges a live refresh token for a new one. No
+        database query is made.
+
+        A refresh token can be exchanged once. Presenting one that was already used or revoked is
+        treated as a stolen token and ends every session of its owner.
+
+        :param refresh_token: The encoded refresh token sent by the client
+        :type refresh_token: str
+        :return: The owner's email and the new refresh token
+        """
+        payload = self.refresh_token_payload(refresh_token)
+        email, jti = payload["sub"], payload.get("jti")
+        if jti is None or not await self.refresh_tokens.consume(jti, email):
+            if jti is not None:
+                await self.refresh_tokens.revoke_all(email)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+            )
+        return email, await self.issue_refresh_token(email)
+
+    async def revoke_refresh_token(self, refresh_token: str, everywhere: bool = False):
+        """
+        The function `revoke_refresh_token` ends the session of a refresh token, or all sessions of
+        its owner.
+
+        :param refresh_token: The encoded refresh token sent by the client
+        :type refresh_token: str
+        :param everywhere: Revoke every refresh token of the owner
+        :type everywhere: bool
+        """
+        payload = self.refresh_token_payload(refresh_token)
+        if everywhere:
+            await self.refresh_tokens.revoke_all(payload["sub"])
+        elif "jti" in payload:
+            await self.refresh_tokens.revoke(payload["jti"], payload["sub"])
+
     async def get_current_user(
         self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
     ):
@@ -160,13 +346,16 @@ class Auth:
         :param db: The `db` parameter in the `get_current_user` function is used to pass the databasesession dependency to the function. It is defined as an `AsyncSession` type and is obtainedusing the `get_db` dependency. This parameter allows the function to interact with the databaseasynchronously within the context
         :type db: AsyncSession
         
-        :return: The `get_current_user` function returns the user object retrieved either from the cacheor the database based on the email extracted from the JWT token payload.
+        :return: The `get_current_user` function returns the user object retrieved either from the cache or the database based on the email extracted from the JWT token payload.
         """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        user = self.principals.get(token)
+        if user is not None:
+            return user
 
         try:
             payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
@@ -179,17 +368,79 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
-        user = self.r.get(f"user:{email}")
+        user = await self.get_cached_user(email)
         if user is None:
             user = await repository_users.get_user_by_email(email, db)
             if user is None:
                 raise credentials_exception
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
+            snapshot = UserSnapshot.model_validate(user)
+            await self.cache_user(snapshot)
         else:
-            user = pickle.loads(user)
+            snapshot = UserSnapshot.model_validate(user)
+        self.principals.put(token, payload["exp"], snapshot)
         return user
 
+    @staticmethod
+    def user_cache_key(email: str) -> str:
+        return f"user:v{USER_SNAPSHOT_VERSION}:{email}"
+
+    async def get_cached_user(self, email: str) -> User | None:
+        """
+        The function `get_cached_user` restores the current user from its cached snapshot.
+
+        The user is rebuilt by `snapshot_to_user` and carries no password hash and no refresh
+        token.
+
+        :param email: The email from the access token
+        :type email: str
+        :return: The cached user, or `None` on a miss, an unreadable snapshot or a Redis error
+        """
+        try:
+            cached = await self.r.get(self.user_cache_key(email))
+        except RedisError as err:
+            logger.warning("Reading the cached user failed: %s", err)
+            return None
+        if cached is None:
+            return None
+        try:
+            snapshot = UserSnapshot.model_validate_json(cached)
+        except ValidationError:
+            return None
+        return snapshot_to_user(snapshot)
+
+    async def cache_user(self, snapshot: UserSnapshot):
+        """
+        The function `cache_user` stores a compact JSON snapshot of the user for `user_ttl` seconds.
+        Login calls it so that the first authenticated request is served without a database query.
+
+        Take the snapshot while the user is freshly loaded: after a commit its expired attributes
+        can no longer be loaded lazily.
+
+        :param snapshot: The snapshot of the user loaded from the database
+        :type snapshot: UserSnapshot
+        """
+        try:
+            await self.r.set(
+                self.user_cache_key(snapshot.email), snapshot.model_dump_json(), ex=self.user_ttl
+            )
+        except RedisError as err:
+            logger.warning("Caching the user failed: %s", err)
+
+    async def forget_user(self, email: str):
+        """
+        The function `forget_user` drops the cached snapshot of a changed user and tells every
+        worker, this one included, to drop its in-process principals of the user.
+
+        :param email: The email of the changed user
+        :type email: str
+        """
+        self.principals.forget(email)
+        try:
+            await self.r.delete(self.user_cache_key(email))
+        except RedisError as err:
+            logger.warning("Dropping the cached user failed: %s", err)
+        await invalidation_bus.publish("user", email)
+
     def create_email_token(self, data: dict):
         """
         The function `create_email_token` generates a JWT token with specified data and expiration time.
@@ -230,3 +481,4 @@ class Auth:
 
 
 auth_service = Auth()
+invalidation_bus.on("user", auth_service.principals.invalidate)
@@ -0,0 +1,278 @@
+import abc
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse, JSONResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import config
+from src.entity.models import User
+from src.services.etag import etag_matches
+
+AVATAR_SIZE = 250
+AVATAR_SIZES = (64, 128, AVATAR_SIZE)
+DIGEST_PATTERN = r"^[0-9a-f]{32}$"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+AVATAR_MAX_PIXELS = 40_000_000
+READ_CHUNK = 64 * 1024
+
+
+class AvatarStorage(abc.ABC):
+    """
+    Where resized avatars are stored. Implementations must not block the event loop.
+    """
+
+    @abc.abstractmethod
+    async def save(self, user: User, variants: dict[int, bytes]) -> str:
+        """
+        The function `save` stores the PNG variants of a user's avatar, keyed by their size, and
+        returns the public URL of the avatar.
+        """
+
+    def digest(self, url: str) -> str | None:
+        """
+        The function `digest` returns the content digest of an avatar URL issued by this storage, or
+        `None` if the avatar lives elsewhere.
+        """
+        return None
+
+    def find(self, digest: str, size: int) -> tuple[Path, os.stat_result] | None:
+        """
+        The function `find` returns the file and its `stat` result of a stored variant, or `None` if
+        the storage cannot serve it from disk.
+        """
+        return None
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Avatars on Cloudinary. The blocking SDK call runs in a worker thread.
+    """
+
+    def __init__(self, folder: str = "RestAPI"):
+        self.folder = folder
+        cloudinary.config(
+            cloud_name=config.CLOUDINARY_NAME,
+            api_key=config.CLOUDINARY_API_KEY,
+            api_secret=config.CLOUDINARY_API_SECRET,
+            secure=True,
+        )
+
+    async def save(self, user: User, variants: dict[int, bytes]) -> str:
+        public_id = f"{self.folder}/{user.username}"
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            io.BytesIO(variants[max(variants)]),
+            public_id=public_id,
+            overwrite=True,
+        )
+        return cloudinary.CloudinaryImage(public_id).build_url(version=result.get("version"))
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Content-addressed avatars on the local filesystem under ``root``, served by the
+    ``GET {base_url}/{id}/avatar`` endpoint.
+
+    Every variant lives at ``{root}/{digest[:2]}/{digest}/{size}.png``, where the digest is taken
+    from the largest variant, so a file never changes once written and can be cached forever under
+    a URL carrying its digest. Files are written to a temporary name and renamed, so readers never
+    see half a file. Replaced avatars are kept, as old URLs may still be cached by clients.
+    """
+
+    def __init__(self, root: str | Path, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # a name of its own per call: concurrent uploads of one image run in different threads
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+            tmp.write(data)
+        try:
+            os.replace(tmp.name, path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    def path(self, digest: str, size: int) -> Path:
+        return self.root / digest[:2] / digest / f"{size}.png"
+
+    def write_variants(self, digest: str, variants: dict[int, bytes]):
+        for size, data in variants.items():
+            path = self.path(digest, size)
+            if not path.exists():
+                self.write(path, data)
+
+    async def save(self, user: User, variants: dict[int, bytes]) -> str:
+        digest = hashlib.sha256(variants[max(variants)]).hexdigest()[:32]
+        await asyncio.to_thread(self.write_variants, digest, variants)
+        return f"{self.base_url}/{user.id}/avatar?v={digest}"
+
+    def digest(self, url: str) -> str | None:
+        parts = urlsplit(url)
+        if parts.netloc or not parts.path.startswith(f"{self.base_url}/"):
+            return None
+        digest = parse_qs(parts.query).get("v", [None])[0]
+        return digest if digest and re.match(DIGEST_PATTERN, digest) else None
+
+    def find(self, digest: str, size: int) -> tuple[Path, os.stat_result] | None:
+        path = self.path(digest, size)
+        try:
+            return path, os.stat(path)
+        except FileNotFoundError:
+            return None
+
+
+def resize_variants(data: bytes, sizes: tuple[int, ...] = AVATAR_SIZES) -> dict[int, bytes]:
+    """
+    The function `resize_variants` decodes an uploaded image once and crops it to a square PNG of
+    every size in `sizes`; the smaller variants are scaled down from the largest one. It is CPU
+    bound; run it in a worker thread.
+
+    :param data: The uploaded image
+    :type data: bytes
+    :param sizes: The sides of the variants in pixels
+    :type sizes: tuple[int, ...]
+    :return: The PNG bytes of each variant, keyed by its size
+    :raises ValueError: If the data is not an image or is too large once decoded
+    """
+    largest = max(sizes)
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > AVATAR_MAX_PIXELS:
+                raise ValueError("Image is too large")
+            image.draft("RGB", (largest * 2, largest * 2))
+            avatar = ImageOps.fit(
+                ImageOps.exif_transpose(image).convert("RGBA"), (largest, largest)
+            )
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as err:
+        raise ValueError("Invalid image") from err
+    variants = {}
+    for size in sizes:
+        out = io.BytesIO()
+        variant = avatar if size == largest else avatar.resize((size, size), Image.LANCZOS)
+        variant.save(out, format="PNG", optimize=True)
+        variants[size] = out.getvalue()
+    return variants
+
+
+def resize_avatar(data: bytes, size: int = AVATAR_SIZE) -> bytes:
+    """
+    The function `resize_avatar` decodes an uploaded image and crops it to a `size` x `size` PNG.
+
+    :raises ValueError: If the data is not an image or is too large once decoded
+    """
+    return resize_variants(data, (size,))[size]
+
+
+def avatar_response(
+    request: Request, path: Path, stat: os.stat_result, digest: str, size: int, immutable: bool
+) -> Response:
+    """
+    The function `avatar_response` serves a stored avatar variant.
+
+    The strong `ETag` is derived from the content digest, so it is the same on every worker. A
+    URL carrying the digest names the content forever and is cached as immutable; any other URL
+    must be revalidated. `FileResponse` streams the file from disk, or hands the path to the
+    server when it supports the `http.response.pathsend` extension.
+
+    :param request: The incoming request, checked for `If-None-Match`
+    :type request: Request
+    :param path: The variant file
+    :type path: Path
+    :param stat: The `stat` result of the file
+    :type stat: os.stat_result
+    :param digest: The content digest of the avatar
+    :type digest: str
+    :param size: The side of the variant in pixels
+    :type size: int
+    :param immutable: Whether the request URL pins the digest
+    :type immutable: bool
+    :return: The file, or `304 Not Modified` if the client's copy is current
+    """
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if immutable else REVALIDATE}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, stat_result=stat, media_type="image/png", headers=headers)
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    The function `read_upload` reads an uploaded file in chunks and stops as soon as it grows
+    past `max_bytes`.
+
+    :raises HTTPException: 413 if the file is larger than `max_bytes`
+    """
+    chunks, size = [], 0
+    while chunk := await file.read(READ_CHUNK):
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Avatar is too large"
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class UploadLimitMiddleware:
+    """
+    Rejects request bodies larger than ``max_bytes`` on ``path`` while they stream in, before they
+    are spooled to disk by the form parser. A declared ``Content-Length`` over the limit is refused
+    before any of the body is read.
+    """
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(
+                {"detail": "Avatar is too large"},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            return await response(scope, receive, send)
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException passes through FastAPI's body parsing and becomes a 413
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Avatar is too large",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def make_storage() -> AvatarStorage:
+    """
+    The function `make_storage` builds the backend selected by the `AVATAR_STORAGE` setting.
+    """
+    if config.AVATAR_STORAGE == "local":
+        return LocalStorage(config.AVATAR_ROOT, config.AVATAR_BASE_URL)
+    return CloudinaryStorage()
+
+
+avatar_storage = make_storage()
@@ -0,0 +1,125 @@
+"""
+The birthday digest job: one email per user listing the contacts with a birthday in the coming days.
+
+Schedule it once a day, e.g. from cron, with ``python -m src.services.birthdays --days 7``.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import sessionmanager
+from src.entity.models import birthday_key
+from src.repository import contacts as repository_contacts
+from src.services.email import send_birthday_digests
+
+
+def upcoming_order(today: date):
+    """
+    The function `upcoming_order` returns a sort key putting birthdays in the order they come after
+    `today`, with the ones after New Year's Eve last.
+    """
+    today_key = birthday_key(today)
+
+    def key(birthday: dict):
+        contact_key = birthday_key(birthday["birthdate"])
+        return contact_key < today_key, contact_key
+
+    return key
+
+
+async def send_digests(
+    db: AsyncSession,
+    today: date,
+    days: int = 7,
+    chunk_size: int = 5000,
+    flush_every: int = 500,
+) -> dict:
+    """
+    The function `send_digests` queues one birthday digest per user with upcoming birthdays.
+
+    The rows of all users are read in one streamed query, ordered by owner, so a user's digest is
+    complete as soon as the next owner starts. Only the current user's birthdays and up to
+    `flush_every` finished digests are held in memory; digests are queued in batches of that size.
+
+    :param db: The database session used to stream the contacts
+    :type db: AsyncSession
+    :param today: The first day of the window
+    :type today: date
+    :param days: The length of the window in days
+    :type days: int
+    :param chunk_size: The number of rows fetched from the cursor at a time
+    :type chunk_size: int
+    :param flush_every: The number of digests queued in one round trip
+    :type flush_every: int
+    :return: The number of rows and emails, the elapsed seconds and rows/s and emails/s
+    """
+    started = time.perf_counter()
+    rows = emails = 0
+    digests = []
+    owner, birthdays = None, []
+
+    async def flush():
+        nonlocal emails, digests
+        if digests:
+            await send_birthday_digests(digests)
+            emails += len(digests)
+            digests = []
+
+    order = upcoming_order(today)
+
+    def finish_owner():
+        if owner is not None:
+            birthdays.sort(key=order)
+            digests.append((owner[1], owner[2], birthdays))
+
+    async for partition in repository_contacts.stream_upcoming_birthdays(
+        db, today, days, chunk_size
+    ):
+        for row in partition:
+            rows += 1
+            if owner is None or row.user_id != owner[0]:
+                finish_owner()
+                owner, birthdays = (row.user_id, row.owner_email, row.owner_username), []
+                if len(digests) >= flush_every:
+                    await flush()
+            birthdays.append(
+                {
+                    "name": row.name,
+                    "surname": row.surname,
+                    "phone_number": row.phone_number,
+                    "birthdate": row.birthdate,
+                }
+            )
+    finish_owner()
+    await flush()
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "emails": emails,
+        "seconds": elapsed,
+        "rows_per_s": rows / elapsed if elapsed else 0.0,
+        "emails_per_s": emails / elapsed if elapsed else 0.0,
+    }
+
+
+async def main(days: int, chunk_size: int):
+    try:
+        async with sessionmanager.session() as db:
+            report = await send_digests(db, date.today(), days, chunk_size)
+    finally:
+        await sessionmanager.close()
+    print(
+        f"{report['rows']} rows, {report['emails']} emails in {report['seconds']:.2f}s "
+        f"({report['rows_per_s']:.0f} rows/s, {report['emails_per_s']:.0f} emails/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.chunk_size))
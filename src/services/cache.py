@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as redis
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from src.conf.config import config
+from src.schemas.contacts import ContactResponse
+from src.services.etag import weak_etag
+from src.services.invalidation import InvalidationBus, invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+redis_pool = redis.ConnectionPool(
+    host=config.REDIS_DOMAIN,
+    port=config.REDIS_PORT,
+    password=config.REDIS_PASSWORD,
+    db=0,
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+contact_adapter = TypeAdapter(ContactResponse)
+contact_list_adapter = TypeAdapter(list[ContactResponse])
+
+
+def params_digest(params: dict) -> str:
+    """
+    The function `params_digest` hashes the arguments of a read into a stable key fragment.
+    """
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ContactsCache:
+    """
+    Read-through cache for contact reads, namespaced per user and per user generation.
+
+    Every key embeds the current generation of its owner (``contacts:{user_id}:{generation}:...``).
+    A write only has to bump the generation to make all the user's cached reads unreachable, which
+    is O(1) no matter how many pages were cached; the orphaned keys expire on their own TTL.
+    Redis failures never fail a request: reads fall back to the database.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        ttl: dict[str, int],
+        enabled: bool = True,
+        bus: InvalidationBus | None = None,
+    ):
+        self.redis = client
+        self.ttl = ttl
+        self.enabled = enabled
+        self.bus = bus
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def generation_key(user_id: int) -> str:
+        return f"contacts:{user_id}:gen"
+
+    async def generation(self, user_id: int) -> int:
+        """
+        The function `generation` returns the current cache generation of a user.
+
+        A missing counter is seeded with the current time in milliseconds rather than 0, so a
+        counter lost to eviction can't fall back to a generation whose keys are still alive.
+
+        :param user_id: The owner of the contacts
+        :type user_id: int
+        :return: The generation to embed into cache keys
+        """
+        key = self.generation_key(user_id)
+        value = await self.redis.get(key)
+        if value is None:
+            await self.redis.set(key, int(time.time() * 1000), nx=True)
+            value = await self.redis.get(key)
+        return int(value)
+
+    async def invalidate(self, user_id: int):
+        """
+        The function `invalidate` bumps the generation of a user so that none of the reads cached
+        before the write can be served again. Call it after every successful contact write.
+
+        :param user_id: The owner of the changed contacts
+        :type user_id: int
+        """
+        if self.enabled:
+            key = self.generation_key(user_id)
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.set(key, int(time.time() * 1000), nx=True)
+                    pipe.incr(key)
+                    await pipe.execute()
+            except RedisError as err:
+                self.errors += 1
+                logger.warning("Bumping the contacts generation failed: %s", err)
+        # published even with the cache disabled: reads of the owner stick to the primary database
+        if self.bus is not None:
+            await self.bus.publish("contacts", str(user_id))
+
+    async def get_or_load(
+        self,
+        user_id: int,
+        kind: str,
+        params: dict,
+        loader: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+    ):
+        """
+        The function `get_or_load` returns a cached read or runs `loader` and caches its result.
+
+        :param user_id: The owner of the contacts
+        :type user_id: int
+        :param kind: The kind of read, one of the keys of `ttl` (e.g. `contact`, `contacts`)
+        :type kind: str
+        :param params: The arguments that identify the read, e.g. filters and page
+        :type params: dict
+        :param loader: A coroutine function running the read against the database
+        :type loader: Callable[[], Awaitable[Any]]
+        :param adapter: The `TypeAdapter` used to serialize and restore the result
+        :type adapter: TypeAdapter
+        :return: The result validated by `adapter`, from the cache or from `loader`. `None` results
+        are returned as is and are not cached
+        """
+        if not self.enabled:
+            return await loader()
+        digest = params_digest(params)
+        try:
+            key = f"contacts:{user_id}:{await self.generation(user_id)}:{kind}:{digest}"
+            cached = await self.redis.get(key)
+        except RedisError as err:
+            self.errors += 1
+            logger.warning("Reading the contacts cache failed: %s", err)
+            return await loader()
+        if cached is not None:
+            self.hits += 1
+            return adapter.validate_json(cached)
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            value = adapter.validate_python(value, from_attributes=True)
+            try:
+                await self.redis.set(key, adapter.dump_json(value), ex=self.ttl[kind])
+            except RedisError as err:
+                self.errors += 1
+                logger.warning("Writing the contacts cache failed: %s", err)
+        return value
+
+    async def etag(self, user_id: int, kind: str, params: dict) -> str | None:
+        """
+        The function `etag` derives a weak ETag for a read from the user's generation, which
+        changes on every contact write. Checking it costs one Redis `GET` and no database query.
+
+        :param user_id: The owner of the contacts
+        :type user_id: int
+        :param kind: The kind of read
+        :type kind: str
+        :param params: The arguments that identify the read
+        :type params: dict
+        :return: The ETag, or `None` if the cache is disabled or Redis is unavailable
+        """
+        if not self.enabled:
+            return None
+        try:
+            generation = await self.generation(user_id)
+        except RedisError as err:
+            self.errors += 1
+            logger.warning("Reading the contacts generation failed: %s", err)
+            return None
+        return weak_etag(user_id, generation, kind, params_digest(params)[:16])
+
+    def stats(self) -> dict:
+        """
+        The function `stats` returns the hit, miss and error counters of this process.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+contacts_cache = ContactsCache(
+    redis_client,
+    ttl={
+        "contact": config.CACHE_CONTACT_TTL,
+        "contacts": config.CACHE_CONTACTS_TTL,
+        "birthdays": config.CACHE_BIRTHDAYS_TTL,
+    },
+    enabled=config.CACHE_ENABLED,
+    bus=invalidation_bus,
+)
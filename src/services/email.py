@@ -1,32 +1,15 @@
-from pathlib import Path
-
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from src.services.auth import auth_service
-from src.conf.config import config
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=config.MAIL_USERNAME,
-    MAIL_PASSWORD=config.MAIL_PASSWORD,
-    MAIL_FROM=config.MAIL_USERNAME,
-    MAIL_PORT=config.MAIL_PORT,
-    MAIL_SERVER=config.MAIL_SERVER,
-    MAIL_FROM_NAME="RestAPI Mail",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
+from src.services.outbox import email_outbox
 
 
 async def send_email(email: EmailStr, username: str, host: str):
     """
-    The function `send_email` sends an email with a verification token to a specified email address for
-    confirmation.
-    
+    The function `send_email` queues an email with a verification token to a specified email address
+    for confirmation. The message is stored in the outbox before the request returns and is rendered
+    and sent by the mailer process (`python -m src.services.mailer`).
+
     :param email: The `send_email` function takes in three parameters:
     :type email: EmailStr
     :param username: The `username` parameter in the `send_email` function is a string that represents
@@ -39,16 +22,38 @@ async def send_email(email: EmailStr, username: str, host: str):
     account activation
     :type host: str
     """
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
+    token_verification = auth_service.create_email_token({"sub": email})
+    await email_outbox.enqueue(
+        "verify_email.html",
+        "Confirm your email ",
+        email,
+        {"host": str(host), "username": username, "token": token_verification},
+    )
+
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        print(err)
\ No newline at end of file
+async def send_birthday_digests(digests: list[tuple[str, str, list[dict]]]):
+    """
+    The function `send_birthday_digests` queues one birthday digest per user in a single round trip
+    to the outbox.
+
+    :param digests: Tuples of the owner's email, username and upcoming birthdays. Each birthday is
+    a dict with `name`, `surname`, `phone_number` and `birthdate`
+    :type digests: list[tuple[str, str, list[dict]]]
+    """
+    await email_outbox.enqueue_many(
+        [
+            (
+                "birthday_digest.html",
+                "Upcoming birthdays",
+                email,
+                {
+                    "username": username,
+                    "birthdays": [
+                        {**birthday, "birthdate": birthday["birthdate"].strftime("%d.%m")}
+                        for birthday in birthdays
+                    ],
+                },
+            )
+            for email, username, birthdays in digests
+        ]
+    )
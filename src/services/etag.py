@@ -0,0 +1,67 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts) -> str:
+    """
+    The function `weak_etag` builds a weak entity tag from the given version parts.
+
+    :param parts: Values that change whenever the representation changes, e.g. a user id and a
+    change counter
+    :return: A weak ETag such as `W/"1-1700000000000-5f2c..."`
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def content_etag(body: bytes) -> str:
+    """
+    The function `content_etag` builds a weak entity tag from a serialized representation.
+
+    :param body: The encoded response body
+    :type body: bytes
+    :return: A weak ETag derived from the SHA-1 of the body
+    """
+    return weak_etag(hashlib.sha1(body).hexdigest()[:20])
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    The function `etag_matches` applies the weak comparison of RFC 9110 between an `If-None-Match`
+    header and the current entity tag.
+
+    :param if_none_match: The raw `If-None-Match` header, possibly a comma-separated list or `*`
+    :type if_none_match: str | None
+    :param etag: The current entity tag of the resource
+    :type etag: str
+    :return: `True` if the client already has the current representation
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, response: Response, etag: str | None) -> Response | None:
+    """
+    The function `not_modified` answers a conditional GET.
+
+    :param request: The incoming request carrying `If-None-Match`
+    :type request: Request
+    :param response: The response whose headers receive the `ETag` when the body has to be sent
+    :type response: Response
+    :param etag: The current entity tag, or `None` when it is unknown
+    :type etag: str | None
+    :return: A `304 Not Modified` response if the client's copy is current, otherwise `None`
+    """
+    if etag is None:
+        return None
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from typing import AsyncContextManager, AsyncIterator, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.entity.models import User
+from src.repository import contacts as repository_contacts
+
+EXPORT_FIELDS = [column.key for column in repository_contacts.EXPORT_COLUMNS]
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def row_to_dict(row) -> dict:
+    """
+    The function `row_to_dict` converts an exported row into JSON-friendly values.
+
+    :param row: A row with the columns of `EXPORT_FIELDS`
+    :return: A dict with dates in ISO 8601 format
+    """
+    data = row._asdict()
+    for key in ("birthdate", "created_at"):
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return data
+
+
+def format_csv(rows: list) -> bytes:
+    """
+    The function `format_csv` renders a chunk of rows as CSV lines.
+
+    :param rows: Rows with the columns of `EXPORT_FIELDS`
+    :type rows: list
+    :return: The encoded CSV chunk without a header
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(row_to_dict(row).values() for row in rows)
+    return buffer.getvalue().encode()
+
+
+def format_ndjson(rows: list) -> bytes:
+    """
+    The function `format_ndjson` renders a chunk of rows as one JSON object per line.
+
+    :param rows: Rows with the columns of `EXPORT_FIELDS`
+    :type rows: list
+    :return: The encoded NDJSON chunk
+    """
+    return "".join(
+        json.dumps(row_to_dict(row), ensure_ascii=False) + "\n" for row in rows
+    ).encode()
+
+
+async def export_contacts(
+    open_session: Callable[[], AsyncContextManager[AsyncSession]], user: User, fmt: str
+) -> AsyncIterator[bytes]:
+    """
+    The function `export_contacts` produces the whole address book of a user as a stream of encoded
+    chunks, one chunk per cursor partition.
+
+    The body is sent after the endpoint has returned and the request session of `get_db` is closed,
+    so the export opens a session of its own. It is closed once the stream is exhausted or the
+    client goes away.
+
+    :param open_session: Opens the session to read from, e.g. `sessionmanager.session`
+    :type open_session: Callable[[], AsyncContextManager[AsyncSession]]
+    :param user: The owner of the contacts
+    :type user: User
+    :param fmt: Either `csv` or `ndjson`
+    :type fmt: str
+    :return: An async iterator of encoded chunks
+    """
+    formatter = format_csv if fmt == "csv" else format_ndjson
+    if fmt == "csv":
+        yield (",".join(EXPORT_FIELDS) + "\n").encode()
+    async with open_session() as db:
+        async for rows in repository_contacts.stream_contacts(db, user):
+            yield formatter(rows)
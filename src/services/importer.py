@@ -0,0 +1,249 @@
+import codecs
+import csv
+import json
+import time
+from typing import AsyncIterable, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.entity.models import User
+from src.repository import contacts as repository_contacts
+from src.schemas.contacts import ContactShema, ImportReport, ImportRowError
+
+CSV_FIELDS = ("name", "surname", "email", "phone_number", "birthdate")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    The function `iter_lines` splits a stream of byte chunks into text lines without reading the
+    whole body into memory.
+
+    :param chunks: The raw request body chunks, e.g. from `Request.stream()`
+    :type chunks: AsyncIterable[bytes]
+    :return: An async iterator of decoded lines without line terminators. A UTF-8 BOM is dropped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def parse_csv(lines: AsyncIterator[str]) -> AsyncIterator[dict | Exception]:
+    """
+    The function `parse_csv` turns CSV lines into row dictionaries. The first non-empty line is the
+    header and must name the `ContactShema` fields. Quoted values spanning several lines are not
+    supported.
+
+    :param lines: The decoded lines of the upload
+    :type lines: AsyncIterator[str]
+    :return: An async iterator yielding a dict per row, or a `ValueError` for rows that can't be read
+    """
+    header = None
+    async for line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            missing = set(CSV_FIELDS) - set(header) - {"birthdate"}
+            if missing:
+                raise ValueError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            continue
+        if len(values) != len(header):
+            yield ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield {key: value for key, value in zip(header, values) if key in CSV_FIELDS and value}
+
+
+async def parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[dict | Exception]:
+    """
+    The function `parse_ndjson` reads one JSON object per line.
+
+    :param lines: The decoded lines of the upload
+    :type lines: AsyncIterator[str]
+    :return: An async iterator yielding a dict per line, or a `ValueError` for invalid JSON
+    """
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as err:
+            yield ValueError(f"Invalid JSON: {err.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield ValueError("Expected a JSON object")
+            continue
+        yield row
+
+
+def vcard_to_row(properties: dict[str, str]) -> dict:
+    """
+    The function `vcard_to_row` maps the properties of a single vCard onto `ContactShema` fields.
+
+    :param properties: The vCard properties keyed by upper-case name, without parameters
+    :type properties: dict[str, str]
+    :return: A dict with the contact fields that were found in the card
+    """
+    row = {}
+    if "N" in properties:
+        parts = properties["N"].split(";")
+        row["surname"] = parts[0].strip()
+        if len(parts) > 1:
+            row["name"] = parts[1].strip()
+    if not row.get("name") and "FN" in properties:
+        row["name"], _, surname = properties["FN"].strip().partition(" ")
+        row.setdefault("surname", surname)
+    if "EMAIL" in properties:
+        row["email"] = properties["EMAIL"].strip()
+    if "TEL" in properties:
+        row["phone_number"] = properties["TEL"].strip()
+    if "BDAY" in properties:
+        bday = properties["BDAY"].strip()
+        if len(bday) == 8 and bday.isdigit():
+            bday = f"{bday[:4]}-{bday[4:6]}-{bday[6:]}"
+        row["birthdate"] = bday
+    return {key: value for key, value in row.items() if value}
+
+
+async def parse_vcard(lines: AsyncIterator[str]) -> AsyncIterator[dict | Exception]:
+    """
+    The function `parse_vcard` reads `BEGIN:VCARD` ... `END:VCARD` blocks. Folded lines are joined
+    and only the first value of each property is kept.
+
+    :param lines: The decoded lines of the upload
+    :type lines: AsyncIterator[str]
+    :return: An async iterator yielding a dict per card
+    """
+    properties = None
+    last = None
+    async for line in lines:
+        if line[:1] in (" ", "\t") and properties is not None and last:
+            properties[last] += line[1:]
+            continue
+        key, _, value = line.partition(":")
+        name = key.split(";")[0].strip().upper()
+        if name == "BEGIN" and value.strip().upper() == "VCARD":
+            properties, last = {}, None
+        elif name == "END" and value.strip().upper() == "VCARD":
+            if properties is not None:
+                yield vcard_to_row(properties)
+            properties, last = None, None
+        elif properties is not None and name and name not in properties:
+            properties[name] = value
+            last = name
+        else:
+            last = None
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson, "vcard": parse_vcard}
+
+
+async def insert_batch(
+    batch: list[tuple[int, ContactShema]],
+    db: AsyncSession,
+    user_id: int,
+    report: ImportReport,
+):
+    """
+    The function `insert_batch` writes one chunk of validated rows in its own transaction and
+    records the outcome in the report. If the chunk is rejected as a whole, its rows are retried one
+    by one so that a single bad row doesn't fail its neighbours.
+
+    :param batch: Pairs of row number and validated contact
+    :type batch: list[tuple[int, ContactShema]]
+    :param db: The database session used for the inserts
+    :type db: AsyncSession
+    :param user_id: The `id` of the owner of the imported contacts
+    :type user_id: int
+    :param report: The report updated in place
+    :type report: ImportReport
+    """
+    try:
+        inserted = await repository_contacts.bulk_create_contacts(
+            [body for _, body in batch], db, user_id
+        )
+    except SQLAlchemyError:
+        await db.rollback()
+        if len(batch) == 1:
+            row, _ = batch[0]
+            report.failed += 1
+            report.errors.append(ImportRowError(row=row, error="Database error"))
+            return
+        for item in batch:
+            await insert_batch([item], db, user_id, report)
+        return
+    for row, body in batch:
+        if body.phone_number in inserted:
+            inserted.discard(body.phone_number)
+            report.imported += 1
+        else:
+            report.failed += 1
+            report.errors.append(
+                ImportRowError(row=row, error="Contact with this phone number already exists")
+            )
+
+
+async def import_contacts(
+    chunks: AsyncIterable[bytes],
+    fmt: str,
+    db: AsyncSession,
+    user: User,
+    batch_size: int | None = None,
+) -> ImportReport:
+    """
+    The function `import_contacts` streams an uploaded address book, validates it row by row and
+    inserts it in chunked transactions.
+
+    :param chunks: The raw upload body
+    :type chunks: AsyncIterable[bytes]
+    :param fmt: One of `csv`, `ndjson` or `vcard`
+    :type fmt: str
+    :param db: The database session used for the inserts
+    :type db: AsyncSession
+    :param user: The owner of the imported contacts
+    :type user: User
+    :param batch_size: The number of rows per `INSERT` and transaction, `IMPORT_BATCH_SIZE` by default
+    :type batch_size: int | None
+    :return: A report with per-row errors and throughput statistics
+    """
+    batch_size = batch_size or config.IMPORT_BATCH_SIZE
+    user_id = user.id
+    started = time.perf_counter()
+    report = ImportReport()
+    batch: list[tuple[int, ContactShema]] = []
+    async for row in PARSERS[fmt](iter_lines(chunks)):
+        report.received += 1
+        if isinstance(row, Exception):
+            report.failed += 1
+            report.errors.append(ImportRowError(row=report.received, error=str(row)))
+            continue
+        try:
+            body = ContactShema.model_validate(row)
+        except ValidationError as err:
+            report.failed += 1
+            message = "; ".join(
+                f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors()
+            )
+            report.errors.append(ImportRowError(row=report.received, error=message))
+            continue
+        batch.append((report.received, body))
+        if len(batch) >= batch_size:
+            await insert_batch(batch, db, user_id, report)
+            batch = []
+    if batch:
+        await insert_batch(batch, db, user_id, report)
+    report.errors.sort(key=lambda error: error.row)
+    report.elapsed = time.perf_counter() - started
+    if report.elapsed:
+        report.rows_per_second = report.received / report.elapsed
+    return report
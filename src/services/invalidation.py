@@ -0,0 +1,222 @@
+import abc
+import asyncio
+import json
+import logging
+from typing import Callable
+
+import asyncpg
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from src.conf.config import config
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str | None], None]
+
+# errors of a lost or unusable bus connection
+BUS_ERRORS = (RedisError, asyncpg.PostgresError, asyncpg.InterfaceError, OSError)
+
+
+class InvalidationBus(abc.ABC):
+    """
+    Broadcasts cache invalidations to every worker process.
+
+    Write paths ``publish`` a ``(kind, key)`` event, e.g. ``("user", email)``. Every worker runs
+    ``listen`` in the background and passes the events it receives to the handlers registered for
+    the kind with ``on``. The publishing worker applies its own events to its handlers right away,
+    so it reads its own writes even while the bus is down, and receives them again from the bus.
+
+    Events sent while a worker is disconnected are lost, so after every (re)subscription the
+    handlers are called with ``key=None`` and must drop everything they hold. Reconnects back off
+    exponentially from ``min_backoff`` to ``max_backoff`` seconds. A handler that raises is logged
+    and does not keep the other handlers or the listener from running.
+    """
+
+    def __init__(self, channel: str, min_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.channel = channel
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.handlers: dict[str, list[Handler]] = {}
+        self.task: asyncio.Task | None = None
+        self.reconnects = 0
+
+    def on(self, kind: str, handler: Handler):
+        """
+        The function `on` registers a handler called with the key of every event of `kind`.
+        """
+        self.handlers.setdefault(kind, []).append(handler)
+
+    def dispatch(self, payload: str | bytes):
+        """
+        The function `dispatch` passes a received event to the handlers of its kind.
+        """
+        try:
+            event = json.loads(payload)
+            kind, key = event["kind"], event["key"]
+        except (ValueError, KeyError, TypeError) as err:
+            logger.warning("Ignoring malformed invalidation %r: %s", payload, err)
+            return
+        for handler in self.handlers.get(kind, []):
+            self.call(handler, kind, key)
+
+    @staticmethod
+    def call(handler: Handler, kind: str, key: str | None):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception("Invalidation handler %r failed on %s %r", handler, kind, key)
+
+    def flush(self):
+        """
+        The function `flush` tells every handler to drop all it holds, after events may have been
+        missed.
+        """
+        for kind, handlers in self.handlers.items():
+            for handler in handlers:
+                self.call(handler, kind, None)
+
+    async def publish(self, kind: str, key: str):
+        """
+        The function `publish` passes an invalidation to the handlers of this worker, then sends it
+        to every worker. Send failures are logged and swallowed: local caches are short-lived and
+        the write itself has already succeeded.
+
+        :param kind: The kind of cached data, e.g. `user` or `contacts`
+        :type kind: str
+        :param key: What changed, e.g. the user's email
+        :type key: str
+        """
+        payload = json.dumps({"kind": kind, "key": key})
+        self.dispatch(payload)
+        try:
+            await self.send(payload)
+        except BUS_ERRORS as err:
+            logger.warning("Publishing the invalidation %s failed: %s", payload, err)
+
+    async def listen(self):
+        """
+        The function `listen` receives events until cancelled, reconnecting and resubscribing
+        whenever the connection drops.
+        """
+        backoff = self.min_backoff
+        while True:
+            try:
+                async for payload in self.subscribe():
+                    if payload is None:
+                        backoff = self.min_backoff
+                        self.flush()
+                        continue
+                    self.dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except BUS_ERRORS as err:
+                logger.warning("Invalidation bus disconnected: %s", err)
+            except Exception:
+                logger.exception("Invalidation listener failed, reconnecting")
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def start(self):
+        """
+        The function `start` runs `listen` as a background task of the current event loop.
+        """
+        if self.task is None:
+            self.task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        """
+        The function `stop` cancels the background listener.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    @abc.abstractmethod
+    async def send(self, payload: str):
+        """
+        Sends the payload of one event to every subscriber.
+        """
+
+    @abc.abstractmethod
+    def subscribe(self):
+        """
+        Yields ``None`` once subscribed, then the payload of every event until the connection drops.
+        """
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """
+    Invalidation bus over Redis pub/sub.
+    """
+
+    def __init__(self, client: redis.Redis, channel: str = "cache:invalidate", **kwargs):
+        super().__init__(channel, **kwargs)
+        self.redis = client
+
+    async def send(self, payload: str):
+        await self.redis.publish(self.channel, payload)
+
+    async def subscribe(self):
+        async with self.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(self.channel)
+            yield None
+            async for message in pubsub.listen():
+                yield message["data"]
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """
+    Invalidation bus over Postgres ``LISTEN`` / ``NOTIFY``, for deployments that would rather not
+    depend on Redis for it. A ``NOTIFY`` sent inside a transaction is delivered only on commit.
+
+    Publishers share one connection, which runs one query at a time, so sends are serialized.
+    """
+
+    def __init__(self, dsn: str, channel: str = "cache_invalidate", **kwargs):
+        super().__init__(channel, **kwargs)
+        self.dsn = dsn
+        self.connection: asyncpg.Connection | None = None
+        self.lock = asyncio.Lock()
+
+    async def send(self, payload: str):
+        async with self.lock:
+            if self.connection is None or self.connection.is_closed():
+                self.connection = await asyncpg.connect(self.dsn)
+            await self.connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def subscribe(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        connection = await asyncpg.connect(self.dsn)
+        connection.add_termination_listener(lambda _: queue.put_nowait(ConnectionError()))
+        try:
+            await connection.add_listener(
+                self.channel, lambda _conn, _pid, _channel, payload: queue.put_nowait(payload)
+            )
+            yield None
+            while True:
+                payload = await queue.get()
+                if isinstance(payload, Exception):
+                    raise payload
+                yield payload
+        finally:
+            await connection.close()
+
+
+def make_bus() -> InvalidationBus:
+    """
+    The function `make_bus` builds the bus selected by the `INVALIDATION_BACKEND` setting.
+    """
+    if config.INVALIDATION_BACKEND == "postgres":
+        return PostgresInvalidationBus(config.DB_URL.replace("postgresql+asyncpg://", "postgresql://"))
+    return RedisInvalidationBus(
+        redis.Redis(host=config.REDIS_DOMAIN, port=config.REDIS_PORT, password=config.REDIS_PASSWORD)
+    )
+
+
+invalidation_bus = make_bus()
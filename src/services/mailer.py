@@ -0,0 +1,181 @@
+"""
+The mailer process: sends the emails queued in the outbox.
+
+Run it next to the web workers with ``python -m src.services.mailer``.
+"""
+import asyncio
+import logging
+import os
+import socket
+from email.message import EmailMessage
+from pathlib import Path
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, TemplateError, select_autoescape
+from redis.exceptions import RedisError
+
+from src.conf.config import config
+from src.services.outbox import EmailOutbox, email_outbox
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
+
+
+class Mailer:
+    """
+    Sends outbox jobs over a fixed pool of long-lived SMTP connections.
+
+    Jobs are read in batches and spread over the connections, which stay open between batches and
+    are reopened only after an error. Templates are compiled once and kept by the Jinja
+    environment. Sent jobs are acknowledged together; failed ones go back to the outbox for a retry
+    and jobs that cannot be rendered go straight to the dead-letter stream.
+    """
+
+    def __init__(
+        self,
+        outbox: EmailOutbox,
+        connections: int,
+        batch_size: int,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        sender: str | None = None,
+        consumer: str | None = None,
+    ):
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.templates = Environment(
+            loader=FileSystemLoader(TEMPLATE_FOLDER),
+            autoescape=select_autoescape(),
+            auto_reload=False,
+        )
+        self.pool = [
+            aiosmtplib.SMTP(
+                hostname=hostname,
+                port=port,
+                use_tls=use_tls,
+                start_tls=start_tls,
+                validate_certs=validate_certs,
+            )
+            for _ in range(connections)
+        ]
+        self.sent = 0
+        self.failed = 0
+
+    def render(self, job: dict) -> EmailMessage:
+        """
+        The function `render` builds the HTML message of a job from its cached template.
+        """
+        message = EmailMessage()
+        message["From"] = f"RestAPI Mail <{self.sender}>"
+        message["To"] = job["to"]
+        message["Subject"] = job["subject"]
+        body = self.templates.get_template(job["template"]).render(**job["context"])
+        message.set_content(body, subtype="html")
+        return message
+
+    async def connect(self, smtp: aiosmtplib.SMTP):
+        if smtp.is_connected:
+            return
+        await smtp.connect()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+
+    async def send_over(self, smtp: aiosmtplib.SMTP, jobs: list) -> tuple[list, list, list]:
+        """
+        The function `send_over` sends jobs one after another over one connection.
+
+        :return: The ids of the sent jobs, the failed jobs with their errors and the jobs that
+            cannot be rendered with their errors
+        """
+        sent, failed, broken = [], [], []
+        for entry_id, job in jobs:
+            try:
+                message = self.render(job)
+            except (TemplateError, KeyError, ValueError, TypeError) as err:
+                broken.append((entry_id, job, repr(err)))
+                continue
+            try:
+                await self.connect(smtp)
+                await smtp.send_message(message)
+                sent.append(entry_id)
+            except (aiosmtplib.SMTPException, OSError) as err:
+                failed.append((entry_id, job, str(err)))
+                smtp.close()
+        return sent, failed, broken
+
+    async def send_batch(self, jobs: list):
+        """
+        The function `send_batch` spreads jobs over the connection pool, then acknowledges the sent
+        ones at once, schedules the failed ones for a retry and dead-letters the broken ones.
+        """
+        results = await asyncio.gather(
+            *(
+                self.send_over(smtp, jobs[i :: len(self.pool)])
+                for i, smtp in enumerate(self.pool)
+            )
+        )
+        sent = [entry_id for ids, _, _ in results for entry_id in ids]
+        failed = [failure for _, failures, _ in results for failure in failures]
+        broken = [failure for _, _, failures in results for failure in failures]
+        await self.outbox.ack(sent)
+        for entry_id, job, error in failed:
+            logger.warning("Sending %s to %s failed: %s", entry_id, job["to"], error)
+            await self.outbox.retry(entry_id, job, error)
+        for entry_id, job, error in broken:
+            logger.error("Dead-lettering %s, it cannot be rendered: %s", entry_id, error)
+            await self.outbox.dead_letter(entry_id, job, error)
+        self.sent += len(sent)
+        self.failed += len(failed) + len(broken)
+
+    async def run(self, block_ms: int = 5000):
+        """
+        The function `run` sends batches until cancelled.
+        """
+        await self.outbox.ensure_group()
+        try:
+            while True:
+                try:
+                    jobs = await self.outbox.read(self.consumer, self.batch_size, block_ms)
+                    if jobs:
+                        await self.send_batch(jobs)
+                except RedisError as err:
+                    # unacknowledged jobs stay pending and are claimed again later
+                    logger.warning("Reading the outbox failed: %s", err)
+                    await asyncio.sleep(1)
+        finally:
+            for smtp in self.pool:
+                if smtp.is_connected:
+                    try:
+                        await smtp.quit()
+                    except (aiosmtplib.SMTPException, OSError):
+                        smtp.close()
+
+
+def make_mailer() -> Mailer:
+    """
+    The function `make_mailer` builds the mailer from the `MAIL_*` settings.
+    """
+    return Mailer(
+        email_outbox,
+        connections=config.MAIL_CONNECTIONS,
+        batch_size=config.MAIL_BATCH_SIZE,
+        hostname=config.MAIL_SERVER,
+        port=config.MAIL_PORT,
+        username=config.MAIL_USERNAME,
+        password=config.MAIL_PASSWORD,
+        use_tls=True,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(make_mailer().run())
@@ -0,0 +1,164 @@
+import json
+import time
+
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+from src.conf.config import config
+from src.services.cache import redis_client
+
+# Moves due retries from the delay set back to the stream. Atomic, so several mailers can run it.
+PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, payload in ipairs(due) do
+    redis.call('ZREM', KEYS[1], payload)
+    redis.call('XADD', KEYS[2], '*', 'payload', payload)
+end
+return #due
+"""
+
+
+class EmailOutbox:
+    """
+    Durable queue of outgoing emails on a Redis stream.
+
+    Web workers ``enqueue`` jobs and return; a mailer process reads them through a consumer group,
+    so a job stays pending until it is acknowledged and one left behind by a crashed mailer is
+    claimed again after ``claim_idle_ms``. Failed jobs wait in a sorted set until their retry is
+    due and go to a dead-letter stream after ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str = "outbox:email",
+        group: str = "mailers",
+        max_attempts: int = 5,
+        backoff: float = 5.0,
+        claim_idle_ms: int = 60000,
+    ):
+        self.redis = client
+        self.stream = stream
+        self.group = group
+        self.delayed = f"{stream}:delayed"
+        self.dead = f"{stream}:dead"
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.claim_idle_ms = claim_idle_ms
+        self.promote_due = client.register_script(PROMOTE_DUE)
+
+    async def enqueue(self, template: str, subject: str, to: str, context: dict) -> str:
+        """
+        The function `enqueue` stores an email to be sent by the mailer.
+
+        :param template: The template file name in `src/services/templates`
+        :type template: str
+        :param subject: The subject line
+        :type subject: str
+        :param to: The recipient address
+        :type to: str
+        :param context: The template variables
+        :type context: dict
+        :return: The stream id of the job
+        """
+        return (await self.enqueue_many([(template, subject, to, context)]))[0]
+
+    async def enqueue_many(self, emails: list[tuple[str, str, str, dict]]) -> list:
+        """
+        The function `enqueue_many` stores several emails in one round trip.
+
+        :param emails: Tuples of template, subject, recipient and template variables
+        :type emails: list[tuple[str, str, str, dict]]
+        :return: The stream ids of the jobs
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for template, subject, to, context in emails:
+                job = {
+                    "template": template,
+                    "subject": subject,
+                    "to": to,
+                    "context": context,
+                    "attempts": 0,
+                }
+                pipe.xadd(self.stream, {"payload": json.dumps(job)})
+            return await pipe.execute()
+
+    async def ensure_group(self):
+        """
+        The function `ensure_group` creates the stream and its consumer group if they are missing.
+        """
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    async def read(self, consumer: str, count: int, block_ms: int) -> list[tuple[str, dict]]:
+        """
+        The function `read` returns up to `count` jobs for `consumer`: retries that are due, jobs
+        abandoned by other consumers and then new jobs, waiting up to `block_ms` for the latter.
+
+        :return: Pairs of stream id and job
+        """
+        await self.promote_due(keys=[self.delayed, self.stream], args=[time.time(), count])
+        _, claimed, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, consumer, self.claim_idle_ms, start_id="0-0", count=count
+        )
+        entries = list(claimed)
+        if len(entries) < count:
+            response = await self.redis.xreadgroup(
+                self.group,
+                consumer,
+                {self.stream: ">"},
+                count=count - len(entries),
+                block=None if entries else block_ms,
+            )
+            for _, messages in response or []:
+                entries.extend(messages)
+        return [(entry_id, json.loads(fields[b"payload"])) for entry_id, fields in entries if fields]
+
+    async def ack(self, entry_ids: list):
+        """
+        The function `ack` removes sent jobs from the stream.
+        """
+        if not entry_ids:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, *entry_ids)
+            pipe.xdel(self.stream, *entry_ids)
+            await pipe.execute()
+
+    async def retry(self, entry_id, job: dict, error: str):
+        """
+        The function `retry` schedules a failed job again after an exponential backoff, or moves it
+        to the dead-letter stream once it has failed `max_attempts` times.
+        """
+        job = {**job, "attempts": job["attempts"] + 1, "error": error}
+        payload = json.dumps(job)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if job["attempts"] >= self.max_attempts:
+                pipe.xadd(self.dead, {"payload": payload})
+            else:
+                due = time.time() + self.backoff * 2 ** (job["attempts"] - 1)
+                pipe.zadd(self.delayed, {payload: due})
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+
+    async def dead_letter(self, entry_id, job: dict, error: str):
+        """
+        The function `dead_letter` moves a job that can never be sent, e.g. one whose template
+        does not render, straight to the dead-letter stream.
+        """
+        payload = json.dumps({**job, "error": error})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead, {"payload": payload})
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+
+email_outbox = EmailOutbox(
+    redis_client, max_attempts=config.MAIL_MAX_ATTEMPTS, backoff=config.MAIL_RETRY_BACKOFF
+)
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+
+from src.conf.config import config
+
+T = TypeVar("T")
+
+
+class PasswordService:
+    """
+    Runs bcrypt hashing and verification in a bounded thread pool instead of on the event loop.
+
+    bcrypt releases the GIL while it works, so a few threads hash in parallel while the loop keeps
+    serving other requests. At most ``workers`` calls run at once; the rest wait in the executor
+    queue, whose depth is reported by ``stats``.
+
+    Hashes are created with ``rounds`` and any hash with a different cost is reported as needing
+    an update, so changing ``BCRYPT_ROUNDS`` rehashes passwords on the next successful login.
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # the counters are updated from the event loop and from the worker threads
+        self.lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.calls = 0
+
+    def _track(self, func: Callable[..., T], *args) -> Callable[[], T]:
+        def call() -> T:
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return func(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        return call
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        with self.lock:
+            self.calls += 1
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._track(func, *args))
+
+    async def hash(self, password: str) -> str:
+        """
+        The function `hash` hashes a password with the configured bcrypt cost.
+
+        :param password: The plain text password
+        :type password: str
+        :return: The bcrypt hash
+        """
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """
+        The function `verify` checks a plain text password against a stored hash.
+
+        :param password: The plain text password
+        :type password: str
+        :param hashed: The stored bcrypt hash
+        :type hashed: str
+        :return: `True` if the password matches
+        """
+        return await self._run(self.context.verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        The function `verify_and_update` checks a password and, when the stored hash was made with
+        another cost, hashes it again with the configured one in the same worker call.
+
+        :param password: The plain text password
+        :type password: str
+        :param hashed: The stored bcrypt hash
+        :type hashed: str
+        :return: Whether the password matches, and the new hash to store or `None`
+        """
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        """
+        The function `stats` returns the pool size, the calls running and waiting right now, the
+        deepest queue seen and the total number of calls of this process.
+        """
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "running": self.running,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "calls": self.calls,
+            }
+
+
+password_service = PasswordService(config.BCRYPT_ROUNDS, config.PASSWORD_HASH_WORKERS)
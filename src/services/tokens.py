@@ -0,0 +1,79 @@
+import redis.asyncio as redis
+
+
+class RefreshTokenStore:
+    """
+    Live refresh tokens in Redis, one key per token id (``jti``) plus a set of token ids per user.
+
+    ``refresh:{jti}`` holds the owner's email and expires with the token, so stale tokens clean up
+    after themselves. ``refresh:user:{email}`` lists the sessions of a user across devices and is
+    only read to revoke them all. Checking, rotating and revoking one token never touch the database.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int):
+        self.redis = client
+        self.ttl = ttl
+
+    @staticmethod
+    def token_key(jti: str) -> str:
+        return f"refresh:{jti}"
+
+    @staticmethod
+    def user_key(email: str) -> str:
+        return f"refresh:user:{email}"
+
+    async def add(self, jti: str, email: str):
+        """
+        The function `add` registers a newly issued refresh token.
+
+        :param jti: The token id claim of the refresh token
+        :type jti: str
+        :param email: The owner of the token
+        :type email: str
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self.token_key(jti), email, ex=self.ttl)
+            pipe.sadd(self.user_key(email), jti)
+            pipe.expire(self.user_key(email), self.ttl)
+            await pipe.execute()
+
+    async def consume(self, jti: str, email: str) -> bool:
+        """
+        The function `consume` removes a refresh token and tells whether it was live. Used on
+        rotation, so each refresh token can be exchanged only once.
+
+        :param jti: The token id claim of the refresh token
+        :type jti: str
+        :param email: The owner named in the token
+        :type email: str
+        :return: `True` if the token was live and belonged to `email`
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.getdel(self.token_key(jti))
+            pipe.srem(self.user_key(email), jti)
+            owner, _ = await pipe.execute()
+        if isinstance(owner, bytes):
+            owner = owner.decode()
+        return owner == email
+
+    async def revoke(self, jti: str, email: str):
+        """
+        The function `revoke` ends one session.
+
+        :param jti: The token id claim of the refresh token
+        :type jti: str
+        :param email: The owner of the token
+        :type email: str
+        """
+        await self.consume(jti, email)
+
+    async def revoke_all(self, email: str):
+        """
+        The function `revoke_all` ends every session of a user, e.g. when a refresh token is reused.
+
+        :param email: The owner of the tokens
+        :type email: str
+        """
+        jtis = await self.redis.smembers(self.user_key(email))
+        keys = [self.token_key(jti.decode() if isinstance(jti, bytes) else jti) for jti in jtis]
+        await self.redis.delete(*keys, self.user_key(email))
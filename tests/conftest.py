@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 from unittest.mock import AsyncMock
 
 import pytest
@@ -9,7 +10,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 
 from main import app
 from src.entity.models import Base, User
-from src.database.db import get_db
+from src.database.db import get_db, get_session_factory
 from src.services.auth import auth_service
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./tests/test.db"
@@ -38,6 +39,87 @@ test_user_not_confirmed = {
 }
 
 
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def set(self, *args, **kwargs):
+        self.commands.append((self.redis.set, args, kwargs))
+
+    def incr(self, *args):
+        self.commands.append((self.redis.incr, args, {}))
+
+    def getdel(self, *args):
+        self.commands.append((self.redis.getdel, args, {}))
+
+    def sadd(self, *args):
+        self.commands.append((self.redis.sadd, args, {}))
+
+    def srem(self, *args):
+        self.commands.append((self.redis.srem, args, {}))
+
+    def expire(self, *args):
+        self.commands.append((self.redis.expire, args, {}))
+
+    async def execute(self):
+        return [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def getdel(self, key):
+        return self.data.pop(key, None)
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def sadd(self, key, *members):
+        members = {m if isinstance(m, bytes) else str(m).encode() for m in members}
+        current = self.data.setdefault(key, set())
+        added = len(members - current)
+        current |= members
+        return added
+
+    async def srem(self, key, *members):
+        members = {m if isinstance(m, bytes) else str(m).encode() for m in members}
+        current = self.data.get(key, set())
+        removed = len(members & current)
+        current -= members
+        return removed
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
 @pytest.fixture(scope="module", autouse=True)
 def init_models_wrap():
     async def init_models():
@@ -82,7 +164,13 @@ def client():
         finally:
             await session.close()
 
+    @contextlib.asynccontextmanager
+    async def override_session():
+        async with TestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: override_session
 
     yield TestClient(app)
 
@@ -1,16 +1,26 @@
 from unittest import mock
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 from urllib import response
 
 import pytest
+from redis.exceptions import RedisError
 
 from src.entity.models import User
-from tests.conftest import TestingSessionLocal, test_user, test_user_not_confirmed
+from tests.conftest import FakeRedis, TestingSessionLocal, test_user, test_user_not_confirmed
 
 user_data = {"username": "testuser", "email": "testuser@gmail.com", "password": "12345678"}
 
+
+@pytest.fixture(autouse=True)
+def mock_token_store(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr("src.services.auth.auth_service.r", fake)
+    monkeypatch.setattr("src.services.auth.auth_service.refresh_tokens.redis", fake)
+    return fake
+
+
 def test_signup(client, monkeypatch, mock_rate_limiter):
-    mock_send_email = MagicMock()
+    mock_send_email = AsyncMock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
     response = client.post("api/auth/signup", json=user_data)
     assert response.status_code == 201
@@ -19,14 +29,26 @@ def test_signup(client, monkeypatch, mock_rate_limiter):
     assert mock_send_email.called
     
 def test_signup_with_existing_user(client, monkeypatch, mock_rate_limiter):
-    mock_send_email = MagicMock()
+    mock_send_email = AsyncMock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
     response = client.post("api/auth/signup", json=test_user)
     assert response.status_code == 409
     data = response.json()
     assert data["detail"] == "Account already exists"
     assert not mock_send_email.called
-    
+
+
+def test_signup_survives_outbox_errors(client, monkeypatch, mock_rate_limiter):
+    mock_send_email = AsyncMock(side_effect=RedisError("outbox down"))
+    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+    response = client.post(
+        "api/auth/signup",
+        json={"username": "outboxdown", "email": "outboxdown@gmail.com", "password": "12345678"},
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["email"] == "outboxdown@gmail.com"
+    assert mock_send_email.called
+
 def test_login(client, monkeypatch, mock_rate_limiter):
     response = client.post("api/auth/login", data={"username": test_user["email"], "password": test_user["password"]})
     assert response.status_code == 200, response.text
@@ -34,6 +56,30 @@ def test_login(client, monkeypatch, mock_rate_limiter):
     assert "access_token" in data
     assert "token_type" in data
     
+def test_login_rehashes_outdated_password(client, mock_token_store, mock_rate_limiter):
+    import asyncio
+
+    from passlib.context import CryptContext
+    from sqlalchemy import select
+
+    email = "rehash@example.com"
+    outdated = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("12345678")
+
+    async def add_user():
+        async with TestingSessionLocal() as session:
+            session.add(User(username="rehash", email=email, password=outdated, confirmed=True))
+            await session.commit()
+
+    async def stored_hash():
+        async with TestingSessionLocal() as session:
+            return await session.scalar(select(User.password).filter(User.email == email))
+
+    asyncio.run(add_user())
+    response = client.post("api/auth/login", data={"username": email, "password": "12345678"})
+    assert response.status_code == 200, response.text
+    assert asyncio.run(stored_hash()).startswith("$2b$12$")
+    assert any(key.startswith("user:") for key in mock_token_store.data)
+
 def test_login_with_invalid_password(client, monkeypatch, mock_rate_limiter):
     response = client.post("api/auth/login", data={"username": test_user["email"], "password": "invalid"})
     assert response.status_code == 401, response.text
@@ -64,7 +110,7 @@ def test_confirmed_email_with_invalid_token(client, mock_rate_limiter):
     assert response.json() == {"detail": "Invalid token for email verification"}
     
 def test_request_email(client, monkeypatch):
-    mock_send_email = MagicMock()
+    mock_send_email = AsyncMock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
     response = client.post("/api/auth/request_email", json={"email": test_user_not_confirmed["email"]})
     assert response.status_code == 200, response.text
@@ -72,8 +118,48 @@ def test_request_email(client, monkeypatch):
     assert mock_send_email.called
     
 def test_request_email_confirmed(client, monkeypatch):
-    mock_send_email = MagicMock()
+    mock_send_email = AsyncMock()
     monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
     response = client.post("/api/auth/request_email", json={"email": test_user["email"]})
     assert response.status_code == 200, response.text
-    assert response.json() == {"message": "Your email is already confirmed"}
\ No newline at end of file
+    assert response.json() == {"message": "Your email is already confirmed"}
+
+
+def login(client):
+    response = client.post("api/auth/login", data={"username": test_user["email"], "password": test_user["password"]})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_refresh_token_rotation(client, mock_rate_limiter):
+    tokens = login(client)
+    headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    response = client.post("api/auth/refresh_token", headers=headers)
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    response = client.post("api/auth/refresh_token", headers=headers)
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Invalid refresh token"
+
+    # reusing a spent token revoked the other sessions too
+    headers = {"Authorization": f"Bearer {rotated['refresh_token']}"}
+    response = client.post("api/auth/refresh_token", headers=headers)
+    assert response.status_code == 401, response.text
+
+
+def test_logout(client, mock_rate_limiter):
+    first = login(client)
+    second = login(client)
+    response = client.post("api/auth/logout", headers={"Authorization": f"Bearer {first['refresh_token']}"})
+    assert response.status_code == 204, response.text
+    response = client.post("api/auth/refresh_token", headers={"Authorization": f"Bearer {first['refresh_token']}"})
+    assert response.status_code == 401, response.text
+
+    response = client.post(
+        "api/auth/logout?everywhere=true", headers={"Authorization": f"Bearer {second['refresh_token']}"}
+    )
+    assert response.status_code == 204, response.text
+    response = client.post("api/auth/refresh_token", headers={"Authorization": f"Bearer {second['refresh_token']}"})
+    assert response.status_code == 401, response.text
@@ -0,0 +1,233 @@
+import json
+
+import pytest
+
+from tests.conftest import FakeRedis, test_user
+
+contacts_data = [
+    {
+        "name": "Alice",
+        "surname": "Smith",
+        "email": "alice@example.com",
+        "phone_number": "0500000001",
+        "birthdate": "1990-05-01",
+    },
+    {
+        "name": "Bob",
+        "surname": "Alison",
+        "email": "bob@example.com",
+        "phone_number": "0500000002",
+        "birthdate": "1991-06-02",
+    },
+    {
+        "name": "Carol",
+        "surname": "Jones",
+        "email": "carol@alice.org",
+        "phone_number": "0500000003",
+        "birthdate": "1992-07-03",
+    },
+]
+
+
+@pytest.fixture
+def mock_redis(monkeypatch):
+    mock_r = FakeRedis()
+    monkeypatch.setattr("src.services.auth.auth_service.r", mock_r)
+    monkeypatch.setattr("src.services.cache.contacts_cache.enabled", False)
+    return mock_r
+
+
+def test_create_contacts(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for body in contacts_data:
+        response = client.post("api/contacts/", json=body, headers=headers)
+        assert response.status_code == 201, response.text
+        assert response.json()["user"]["email"] == test_user["email"]
+
+
+def test_search_contacts(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/search", params={"q": "alice"}, headers=headers)
+    assert response.status_code == 200, response.text
+    names = [contact["name"] for contact in response.json()]
+    assert names == ["Alice", "Carol"]
+
+
+def test_search_contacts_escapes_wildcards(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/search", params={"q": "%"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+
+
+def test_import_contacts_csv(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    body = (
+        "name,surname,email,phone_number,birthdate\n"
+        "Dave,Brown,dave@example.com,0500000004,1993-08-04\n"
+        "Eve,Black,eve@example.com,0500000001,1994-09-05\n"
+        "Fr,White,frank@example.com,0500000006,1995-10-06\n"
+        "Grace,Green,grace@example.com\n"
+    )
+    response = client.post(
+        "api/contacts/import", params={"format": "csv"}, content=body, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["received"] == 4
+    assert data["imported"] == 1
+    assert data["failed"] == 3
+    assert [error["row"] for error in data["errors"]] == [2, 3, 4]
+
+
+def test_import_contacts_ndjson_and_vcard(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    ndjson = (
+        '{"name": "Heidi", "surname": "Gray", "email": "heidi@example.com", '
+        '"phone_number": "0500000008", "birthdate": "1996-11-07"}\n'
+        "not json\n"
+    )
+    response = client.post(
+        "api/contacts/import", params={"format": "ndjson"}, content=ndjson, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 1
+    assert response.json()["errors"][0]["row"] == 2
+
+    vcard = (
+        "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Stone;Ivan;;;\r\nFN:Ivan Stone\r\n"
+        "EMAIL;TYPE=home:ivan@example.com\r\nTEL;TYPE=cell:0500000009\r\n"
+        "BDAY:19971208\r\nEND:VCARD\r\n"
+    )
+    response = client.post(
+        "api/contacts/import", params={"format": "vcard"}, content=vcard, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 1
+
+    response = client.get("api/contacts/search", params={"q": "ivan"}, headers=headers)
+    assert response.json()[0]["surname"] == "Stone"
+    assert response.json()[0]["birthdate"].startswith("1997-12-08")
+
+
+def test_export_contacts(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,surname,email,phone_number,birthdate,created_at"
+    assert len(lines) == 7
+
+    response = client.get("api/contacts/export", params={"format": "ndjson"}, headers=headers)
+    assert response.status_code == 200, response.text
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert rows[0]["name"] == "Alice"
+
+
+def test_update_contact(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    body = {**contacts_data[0], "name": "Alicia", "birthdate": "1990-12-30"}
+    response = client.put("api/contacts/1", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["name"] == "Alicia"
+    assert data["user"]["email"] == test_user["email"]
+
+    response = client.put("api/contacts/9999", json=body, headers=headers)
+    assert response.status_code == 404, response.text
+    assert response.json()["detail"] == "contact not found"
+
+
+def test_delete_contact(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.delete("api/contacts/3", headers=headers)
+    assert response.status_code == 204, response.text
+    response = client.get("api/contacts/search", params={"q": "carol"}, headers=headers)
+    assert response.json() == []
+
+
+def test_get_contacts_include_total(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/", params={"include_total": True}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Total-Count"] == str(len(response.json()))
+
+    response = client.get(
+        "api/contacts/", params={"include_total": True, "offset": 100}, headers=headers
+    )
+    assert response.json() == []
+    assert int(response.headers["X-Total-Count"]) > 0
+
+    response = client.get(
+        "api/contacts/", params={"include_total": True, "name": "zzz"}, headers=headers
+    )
+    assert response.headers["X-Total-Count"] == "0"
+
+
+def test_conditional_get_contacts(client, get_token, mock_rate_limiter, mock_redis, monkeypatch):
+    monkeypatch.setattr("src.services.cache.contacts_cache.enabled", True)
+    monkeypatch.setattr("src.services.cache.contacts_cache.redis", FakeRedis())
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/", headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    response = client.get("api/contacts/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("api/contacts/1", headers=headers)
+    contact_etag = response.headers["ETag"]
+    assert contact_etag != etag
+    response = client.get("api/contacts/1", headers={**headers, "If-None-Match": contact_etag})
+    assert response.status_code == 304
+
+    body = {**contacts_data[0], "name": "Alison"}
+    response = client.put("api/contacts/1", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get("api/contacts/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["name"] == "Alison"
+
+
+def test_get_contacts_batch(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/contacts/batch", params={"ids": "2,9999,1,2"}, headers=headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [contact["id"] for contact in data["contacts"]] == [2, 1]
+    assert data["missing"] == [9999]
+
+    response = client.post("api/contacts/batch", json={"ids": [1, 3]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["missing"] == [3]
+
+    response = client.get("api/contacts/batch", params={"ids": "1,a"}, headers=headers)
+    assert response.status_code == 422
+
+    ids = ",".join(str(i) for i in range(1, 102))
+    response = client.get("api/contacts/batch", params={"ids": ids}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_get_contacts_lean(client, get_token, mock_rate_limiter, mock_redis):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get(
+        "api/contacts/lean", params={"fields": "name,phone_number"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["owner"] is None
+    assert set(data["contacts"][0]) == {"id", "name", "phone_number"}
+
+    response = client.get("api/contacts/lean", params={"fields": "name,user"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["owner"]["email"] == test_user["email"]
+    assert "user" not in response.json()["contacts"][0]
+
+    response = client.get("api/contacts/lean", params={"fields": "name,password"}, headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,32 @@
+import pytest
+
+from src.conf.config import config
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TOKEN", "scraper-secret")
+    return "scraper-secret"
+
+
+def test_get_metrics(client, metrics_token):
+    response = client.get("/api/metrics/", headers={"X-Metrics-Token": metrics_token})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert set(data) == {"database", "passwords", "principals", "contacts_cache"}
+
+
+def test_get_metrics_wrong_token(client, metrics_token):
+    response = client.get("/api/metrics/", headers={"X-Metrics-Token": "guess"})
+    assert response.status_code == 404, response.text
+
+
+def test_get_metrics_without_token(client, metrics_token):
+    response = client.get("/api/metrics/")
+    assert response.status_code == 404, response.text
+
+
+def test_get_metrics_disabled_without_setting(client, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TOKEN", None)
+    response = client.get("/api/metrics/", headers={"X-Metrics-Token": ""})
+    assert response.status_code == 404, response.text
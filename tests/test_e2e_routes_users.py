@@ -0,0 +1,73 @@
+from unittest.mock import AsyncMock
+
+from tests.conftest import FakeRedis, test_user
+
+
+def test_get_me_conditional(client, get_token, mock_rate_limiter, monkeypatch):
+    monkeypatch.setattr("src.services.auth.auth_service.r", FakeRedis())
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("api/users/me", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == test_user["email"]
+    etag = response.headers["ETag"]
+
+    response = client.get("api/users/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_update_avatar(client, get_token, mock_rate_limiter, monkeypatch, tmp_path):
+    from tests.test_unit_services_avatars import make_image
+    from src.services.avatars import LocalStorage
+
+    monkeypatch.setattr("src.services.auth.auth_service.r", FakeRedis())
+    monkeypatch.setattr("src.routes.users.avatar_storage", LocalStorage(tmp_path, "/api/users"))
+    invalidate = AsyncMock()
+    monkeypatch.setattr("src.routes.users.contacts_cache.invalidate", invalidate)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    files = {"file": ("avatar.jpg", make_image(), "image/jpeg")}
+    response = client.patch("api/users/avatar", headers=headers, files=files)
+    assert response.status_code == 200, response.text
+    assert response.json()["avatar"].startswith("/api/users/")
+    invalidate.assert_awaited_once_with(response.json()["id"])
+    assert len(list(tmp_path.glob("*/*/*.png"))) == 3
+
+    files = {"file": ("avatar.jpg", b"not an image", "image/jpeg")}
+    response = client.patch("api/users/avatar", headers=headers, files=files)
+    assert response.status_code == 400, response.text
+
+    monkeypatch.setattr("src.routes.users.config.AVATAR_MAX_BYTES", 100)
+    files = {"file": ("avatar.jpg", make_image(), "image/jpeg")}
+    response = client.patch("api/users/avatar", headers=headers, files=files)
+    assert response.status_code == 413, response.text
+
+
+def test_get_avatar(client, get_token, mock_rate_limiter, monkeypatch, tmp_path):
+    from tests.test_unit_services_avatars import make_image
+    from src.services.avatars import IMMUTABLE, LocalStorage, REVALIDATE
+
+    monkeypatch.setattr("src.services.auth.auth_service.r", FakeRedis())
+    monkeypatch.setattr("src.routes.users.avatar_storage", LocalStorage(tmp_path, "/api/users"))
+    headers = {"Authorization": f"Bearer {get_token}"}
+    files = {"file": ("avatar.jpg", make_image(), "image/jpeg")}
+    url = client.patch("api/users/avatar", headers=headers, files=files).json()["avatar"]
+
+    response = client.get(f"{url}&size=64")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == IMMUTABLE
+    etag = response.headers["etag"]
+    assert not etag.startswith("W/")
+
+    response = client.get(f"{url}&size=64", headers={"If-None-Match": etag})
+    assert response.status_code == 304, response.text
+
+    response = client.get(url.split("?")[0])
+    assert response.status_code == 200, response.text
+    assert response.headers["cache-control"] == REVALIDATE
+
+    response = client.get(f"{url}&size=100")
+    assert response.status_code == 422, response.text
+
+    response = client.get("api/users/999999/avatar")
+    assert response.status_code == 404, response.text
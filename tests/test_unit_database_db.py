@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from src.database.db import DatabaseSessionManager, PoolTelemetry, execute_read
+from src.services.cache import ContactsCache
+from src.services.invalidation import InvalidationBus
+from tests.conftest import FakeRedis
+
+
+def make_database(name: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE servers (name TEXT)")
+        connection.execute("INSERT INTO servers VALUES (?)", (name,))
+    return path
+
+
+class DisconnectedBus(InvalidationBus):
+    """
+    Never delivers anything: every send fails and the subscription never starts.
+    """
+
+    async def send(self, payload):
+        raise ConnectionError("bus down")
+
+    async def subscribe(self):
+        raise ConnectionError("bus down")
+        yield
+
+
+class TestPoolTelemetry(unittest.TestCase):
+
+    def test_wait_histogram(self):
+        telemetry = PoolTelemetry(buckets=(1, 10))
+        for seconds in (0.0005, 0.005, 0.005, 0.5):
+            telemetry.observe_wait(seconds)
+        wait = telemetry.stats()["wait_ms"]
+        self.assertEqual(wait["count"], 4)
+        self.assertEqual(wait["buckets"], {"1": 1, "10": 3, "+Inf": 4})
+        self.assertAlmostEqual(wait["max"], 500)
+        self.assertAlmostEqual(wait["sum"], 510.5)
+
+
+class TestDatabaseSessionManager(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.manager = DatabaseSessionManager(
+            f"sqlite+aiosqlite:///{self.path}", pool_size=2, max_overflow=0, pool_timeout=1
+        )
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        os.remove(self.path)
+
+    async def test_stats(self):
+        async with self.manager.session() as db:
+            await db.execute(text("SELECT 1"))
+            stats = self.manager.stats()
+            self.assertEqual(stats["checked_out"], 1)
+        stats = self.manager.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["checkouts"], 1)
+        self.assertEqual(stats["connects"], 1)
+        self.assertEqual(stats["wait_ms"]["count"], 1)
+
+    async def test_close(self):
+        await self.manager.close()
+        self.assertEqual(self.manager.stats(), {})
+        with self.assertRaises(Exception):
+            async with self.manager.session():
+                pass
+
+
+class TestReplicaRouting(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.paths = [make_database("primary"), make_database("replica")]
+        self.manager = DatabaseSessionManager(
+            f"sqlite+aiosqlite:///{self.paths[0]}",
+            replica_urls=[f"sqlite+aiosqlite:///{self.paths[1]}"],
+            sticky_seconds=60,
+            eject_seconds=60,
+        )
+        self.query = text("SELECT name FROM servers")
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        for path in self.paths:
+            os.remove(path)
+
+    async def read(self, kind="contacts", key=1) -> str:
+        async with self.manager.session() as db:
+            result = await execute_read(db, self.query, kind, key)
+            return result.scalar_one()
+
+    async def test_reads_go_to_replica(self):
+        self.assertEqual(await self.read(), "replica")
+        async with self.manager.session() as db:
+            self.assertEqual((await db.execute(self.query)).scalar_one(), "primary")
+        self.assertEqual(self.manager.stats()["replicas"][0]["reads"], 1)
+
+    async def test_sticky_after_write(self):
+        self.manager.replicas.stick("contacts", "1")
+        self.assertEqual(await self.read(key=1), "primary")
+        self.assertEqual(await self.read(key=2), "replica")
+        self.assertEqual(await self.read(kind="user", key=1), "replica")
+        self.manager.replicas.stick("user", None)
+        self.assertEqual(await self.read(key=2), "primary")
+
+    async def test_sticky_after_write_with_bus_down(self):
+        bus = DisconnectedBus("test")
+        bus.on("contacts", lambda key: self.manager.replicas.stick("contacts", key))
+        cache = ContactsCache(FakeRedis(), ttl={"contacts": 60}, bus=bus)
+        await cache.invalidate(1)
+        self.assertEqual(await self.read(key=1), "primary")
+        self.assertEqual(await self.read(key=2), "replica")
+
+    async def test_failed_replica_is_ejected(self):
+        await self.manager.close()
+        self.manager = DatabaseSessionManager(
+            f"sqlite+aiosqlite:///{self.paths[0]}",
+            replica_urls=["sqlite+aiosqlite:////nonexistent/replica.db"],
+            eject_seconds=60,
+        )
+        self.assertEqual(await self.read(), "primary")
+        replica = self.manager.stats()["replicas"][0]
+        self.assertFalse(replica["healthy"])
+        self.assertEqual(replica["ejections"], 1)
+        self.assertEqual(await self.read(), "primary")
+        self.assertEqual(self.manager.stats()["replicas"][0]["reads"], 1)
+
+    async def test_without_replicas(self):
+        manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{self.paths[0]}")
+        async with manager.session() as db:
+            result = await execute_read(db, self.query, "contacts", 1)
+            self.assertEqual(result.scalar_one(), "primary")
+        await manager.close()
+
+
+class TestLazySession(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.path = make_database("primary")
+        self.manager = DatabaseSessionManager(f"sqlite+aiosqlite:///{self.path}")
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        os.remove(self.path)
+
+    async def test_unused_session_is_never_opened(self):
+        async with self.manager.lazy_session() as db:
+            self.assertFalse(db.opened)
+        self.assertFalse(db.opened)
+        self.assertEqual(self.manager.stats()["checkouts"], 0)
+
+    async def test_session_opens_on_first_use(self):
+        async with self.manager.lazy_session() as db:
+            result = await db.execute(text("SELECT name FROM servers"))
+            self.assertEqual(result.scalar_one(), "primary")
+            self.assertTrue(db.opened)
+            self.assertEqual(self.manager.stats()["checked_out"], 1)
+        self.assertEqual(self.manager.stats()["checked_out"], 0)
+        self.assertEqual(self.manager.stats()["checkouts"], 1)
+
+    async def test_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            async with self.manager.lazy_session() as db:
+                await db.execute(text("INSERT INTO servers VALUES ('other')"))
+                raise ValueError
+        async with self.manager.lazy_session() as db:
+            result = await db.execute(text("SELECT count(*) FROM servers"))
+            self.assertEqual(result.scalar_one(), 1)
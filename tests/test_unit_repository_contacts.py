@@ -1,5 +1,6 @@
 import unittest
 import asyncio
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
 from datetime import datetime
 
@@ -52,12 +53,108 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(result, self.contacts[0])
 
+    async def test_get_contacts_with_cursor(self):
+        mocked_contacts = MagicMock()
+        mocked_contacts.scalars.return_value.all.return_value = [self.contacts[1]]
+        self.session.execute.return_value = mocked_contacts
+        result = await get_contacts(
+            name=None,
+            surname=None,
+            email=None,
+            offset=0,
+            limit=10,
+            db=self.session,
+            user=self.user,
+            cursor=encode_cursor(1),
+        )
+        self.assertEqual(result, [self.contacts[1]])
+        stmt = self.session.execute.call_args.args[0]
+        self.assertIsNone(stmt._offset_clause)
+        self.assertIn("contacts.id >", str(stmt))
+        self.assertEqual(
+            self.session.execute.call_args.args[1], {"user_id": 1, "limit": 10, "after_id": 1}
+        )
+
+    def test_contacts_list_statement_is_cached(self):
+        shapes = {
+            contacts_list_statement(name, surname, email, cursor)
+            for name in (False, True)
+            for surname in (False, True)
+            for email in (False, True)
+            for cursor in (False, True)
+        }
+        self.assertEqual(len(shapes), 16)
+        self.assertIs(
+            contacts_list_statement(True, False, False, False),
+            contacts_list_statement(True, False, False, False),
+        )
+
+    async def test_get_contacts_with_total(self):
+        mocked_contacts = MagicMock()
+        Row = namedtuple("Row", ["Contact", "total"])
+        mocked_contacts.all.return_value = [Row(contact, 2) for contact in self.contacts]
+        self.session.execute.return_value = mocked_contacts
+        contacts, total = await get_contacts_with_total(
+            None, None, None, 0, 10, self.session, self.user
+        )
+        self.assertEqual(contacts, self.contacts)
+        self.assertEqual(total, 2)
+        self.assertIn("count(*) OVER ()", str(self.session.execute.call_args.args[0]))
+        self.session.scalar.assert_not_called()
+
+    async def test_get_contacts_with_total_past_the_end(self):
+        page, count = MagicMock(), MagicMock()
+        page.all.return_value = []
+        count.scalar_one.return_value = 2
+        self.session.execute.side_effect = [page, count]
+        contacts, total = await get_contacts_with_total(
+            "test", None, None, 10, 10, self.session, self.user
+        )
+        self.assertEqual((contacts, total), ([], 2))
+        stmt, params = self.session.execute.call_args.args
+        self.assertIs(stmt, contacts_count_statement(True, False, False))
+        self.assertEqual(params["name"], "%test%")
+
+    async def test_get_contacts_fields(self):
+        mocked_contacts = MagicMock()
+        mocked_contacts.mappings.return_value.all.return_value = [{"id": 1, "name": "test"}]
+        self.session.execute.return_value = mocked_contacts
+        result = await get_contacts_fields(
+            ["name"], None, None, None, 0, 10, self.session, self.user
+        )
+        self.assertEqual(result, [{"id": 1, "name": "test"}])
+        sql = str(self.session.execute.call_args.args[0])
+        self.assertTrue(sql.startswith("SELECT contacts.id, contacts.name \nFROM contacts"))
+        self.assertNotIn("JOIN", sql)
+        self.assertIs(
+            self.session.execute.call_args.args[0],
+            contacts_fields_statement(("name",), False, False, False, False),
+        )
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
     async def test_get_contact(self):
         mocked_contact = MagicMock()
         mocked_contact.scalar_one_or_none.return_value = self.contacts[0]
         self.session.execute.return_value = mocked_contact
         result = await get_contact(contact_id=1, db=self.session, user=self.user)
         self.assertEqual(result, self.contacts[0])
+        self.session.execute.assert_awaited_once_with(
+            CONTACT_BY_ID, {"contact_id": 1, "user_id": 1}
+        )
+
+    async def test_get_contacts_by_ids(self):
+        self.session.get_bind.return_value.dialect.name = "postgresql"
+        mocked_contacts = MagicMock()
+        mocked_contacts.scalars.return_value.all.return_value = self.contacts
+        self.session.execute.return_value = mocked_contacts
+        result = await get_contacts_by_ids([1, 2], db=self.session, user=self.user)
+        self.assertEqual(result, self.contacts)
+        stmt = self.session.execute.call_args.args[0]
+        self.assertIn("ANY", str(stmt))
 
     async def test_create_contact(self):
         body = ContactShema(
@@ -75,9 +172,6 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.phone_number, body.phone_number)
 
     async def test_update_contact(self):
-        mocked_contact = MagicMock()
-        mocked_contact.scalar_one_or_none.return_value = self.contacts[0]
-        self.session.execute.return_value = mocked_contact
         body = ContactShema(
             name="test2",
             surname="test2",
@@ -85,19 +179,47 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
             phone_number="1234567890",
             birthdate="2025-01-01",
         )
+        updated = Contact(id=1, user_id=1, **body.model_dump())
+        mocked_contact = MagicMock()
+        mocked_contact.scalar_one_or_none.return_value = updated
+        self.session.execute.return_value = mocked_contact
         result = await update_contact(1, body, self.session, self.user)
+        stmt = self.session.execute.call_args.args[0]
+        self.assertTrue(stmt.is_update)
+        self.assertIsNotNone(stmt._returning)
+        self.assertEqual(stmt.compile().params["birthday_key"], 101)
         self.assertIsInstance(result, Contact)
         self.assertEqual(result.name, body.name)
         self.assertEqual(result.surname, body.surname)
         self.assertEqual(result.email, body.email)
         self.assertEqual(result.phone_number, body.phone_number)
+        self.assertIs(result.user, self.user)
+        self.session.commit.assert_awaited_once()
+        self.session.refresh.assert_not_called()
+
+    async def test_update_contact_not_found(self):
+        mocked_contact = MagicMock()
+        mocked_contact.scalar_one_or_none.return_value = None
+        self.session.execute.return_value = mocked_contact
+        body = ContactShema(
+            name="test2",
+            surname="test2",
+            email="test12345",
+            phone_number="1234567890",
+            birthdate="2025-01-01",
+        )
+        result = await update_contact(1, body, self.session, self.user)
+        self.assertIsNone(result)
 
     async def test_delete_contact(self):
         mocked_contact = MagicMock()
-        mocked_contact.scalar_one_or_none.return_value = self.contacts[0]
+        mocked_contact.scalar_one_or_none.return_value = self.contacts[0].id
         self.session.execute.return_value = mocked_contact
         result = await delete_contact(1, self.session, self.user)
-        self.assertEqual(result, self.contacts[0])
+        stmt = self.session.execute.call_args.args[0]
+        self.assertTrue(stmt.is_delete)
+        self.assertEqual(result, self.contacts[0].id)
+        self.session.delete.assert_not_called()
 
     @patch("src.repository.contacts.datetime")
     async def test_get_birthdays_soon(self, mock_datetime):
@@ -108,4 +230,19 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         mocked_contacts.scalars.return_value.all.return_value = [self.contacts[0]]
         self.session.execute.return_value = mocked_contacts
         result = await get_birthdays_soon(offset, limit, self.session, self.user)
-        self.assertEqual(result, [self.contacts[0]])
\ No newline at end of file
+        self.assertEqual(result, [self.contacts[0]])
+
+    def test_contact_birthday_key(self):
+        self.assertEqual(self.contacts[0].birthday_key, 101)
+        self.assertEqual(self.contacts[1].birthday_key, 210)
+
+    def test_birthday_window(self):
+        clause = birthday_window(datetime(2025, 1, 28), 7)
+        self.assertEqual(clause.right.clauses[0].value, 128)
+        self.assertEqual(clause.right.clauses[1].value, 204)
+
+    def test_birthday_window_wraps_year(self):
+        clause = birthday_window(datetime(2025, 12, 28), 7)
+        lower, upper = clause.clauses
+        self.assertEqual(lower.right.value, 1228)
+        self.assertEqual(upper.right.value, 104)
\ No newline at end of file
@@ -30,6 +30,11 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         await update_token(user=self.user, token=token, db=self.session)
         self.assertEqual(self.user.refresh_token, token)
         
+    async def test_update_password(self):
+        await update_password(user=self.user, password="new_hash", db=self.session)
+        self.assertEqual(self.user.password, "new_hash")
+        self.session.commit.assert_awaited_once()
+
     async def test_get_user_by_email(self):
         mocked_user = MagicMock()
         mocked_user.scalar_one_or_none.return_value = self.user
@@ -0,0 +1,112 @@
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from redis.exceptions import ConnectionError
+from sqlalchemy import inspect
+
+from src.entity.models import User
+from src.schemas.users import UserSnapshot
+from src.services.auth import Auth, PrincipalCache
+from tests.conftest import FakeRedis
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.auth = Auth()
+        self.auth.r = FakeRedis()
+        self.auth.principals = PrincipalCache(maxsize=10, ttl=60)
+        self.user = User(
+            id=1,
+            username="test_user",
+            email="test@gmail.com",
+            password="hashed",
+            refresh_token="refresh",
+            confirmed=True,
+            created_at=datetime(2025, 1, 1),
+        )
+
+    async def test_cache_user_round_trip(self):
+        await self.auth.cache_user(UserSnapshot.model_validate(self.user))
+        user = await self.auth.get_cached_user("test@gmail.com")
+        self.assertEqual(user.id, 1)
+        self.assertEqual(user.username, "test_user")
+        self.assertTrue(user.confirmed)
+        self.assertTrue(inspect(user).detached)
+
+    async def test_snapshot_has_no_secrets(self):
+        await self.auth.cache_user(UserSnapshot.model_validate(self.user))
+        cached = self.auth.r.data[self.auth.user_cache_key("test@gmail.com")]
+        self.assertNotIn(b"hashed", cached)
+        self.assertNotIn(b"refresh", cached)
+
+    async def test_forget_user(self):
+        await self.auth.cache_user(UserSnapshot.model_validate(self.user))
+        await self.auth.forget_user("test@gmail.com")
+        self.assertIsNone(await self.auth.get_cached_user("test@gmail.com"))
+
+    async def test_unreadable_snapshot_is_a_miss(self):
+        self.auth.r.data[self.auth.user_cache_key("test@gmail.com")] = b"\x80\x04garbage"
+        self.assertIsNone(await self.auth.get_cached_user("test@gmail.com"))
+
+    async def test_redis_error_is_a_miss(self):
+        self.auth.r = AsyncMock()
+        self.auth.r.get.side_effect = ConnectionError()
+        self.auth.r.set.side_effect = ConnectionError()
+        await self.auth.cache_user(UserSnapshot.model_validate(self.user))
+        self.assertIsNone(await self.auth.get_cached_user("test@gmail.com"))
+
+
+class TestPrincipalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PrincipalCache(maxsize=2, ttl=60)
+        self.snapshot = UserSnapshot(id=1, username="test_user", email="test@gmail.com")
+
+    def test_hit_after_put(self):
+        self.assertIsNone(self.cache.get("token"))
+        self.cache.put("token", time.time() + 900, self.snapshot)
+        user = self.cache.get("token")
+        self.assertEqual(user.id, 1)
+        self.assertIsNot(user, self.cache.get("token"))
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_entry_never_outlives_token(self):
+        self.cache.put("token", time.time() - 1, self.snapshot)
+        self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("first", time.time() + 900, self.snapshot)
+        self.cache.put("second", time.time() + 900, self.snapshot)
+        self.cache.get("first")
+        self.cache.put("third", time.time() + 900, self.snapshot)
+        self.assertIsNotNone(self.cache.get("first"))
+        self.assertIsNone(self.cache.get("second"))
+
+    def test_forget_drops_user_tokens(self):
+        self.cache.put("token", time.time() + 900, self.snapshot)
+        self.cache.forget("test@gmail.com")
+        self.assertIsNone(self.cache.get("token"))
+
+
+class TestGetCurrentUser(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.auth = Auth()
+        self.auth.r = FakeRedis()
+        self.auth.principals = PrincipalCache(maxsize=10, ttl=60)
+        self.user = User(id=1, username="test_user", email="test@gmail.com", confirmed=True)
+
+    async def test_second_request_skips_redis(self):
+        token = await self.auth.create_access_token(data={"sub": "test@gmail.com"})
+        await self.auth.cache_user(UserSnapshot.model_validate(self.user))
+        first = await self.auth.get_current_user(token, db=None)
+        self.auth.r = AsyncMock()
+        second = await self.auth.get_current_user(token, db=None)
+        self.assertEqual(first.id, second.id)
+        self.auth.r.get.assert_not_called()
+        self.assertEqual(self.auth.principals.stats()["hits"], 1)
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.entity.models import User
+from src.services.avatars import (
+    AvatarStorage,
+    LocalStorage,
+    read_upload,
+    resize_avatar,
+    resize_variants,
+)
+
+
+def make_image(size=(800, 600), format="JPEG") -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, format=format)
+    return out.getvalue()
+
+
+class TestAvatars(unittest.IsolatedAsyncioTestCase):
+
+    def test_resize_avatar(self):
+        avatar = resize_avatar(make_image())
+        with Image.open(io.BytesIO(avatar)) as image:
+            self.assertEqual(image.size, (250, 250))
+            self.assertEqual(image.format, "PNG")
+
+    def test_resize_variants(self):
+        variants = resize_variants(make_image(), (64, 128, 250))
+        self.assertEqual(sorted(variants), [64, 128, 250])
+        for size, data in variants.items():
+            with Image.open(io.BytesIO(data)) as image:
+                self.assertEqual(image.size, (size, size))
+
+    def test_resize_avatar_rejects_non_images(self):
+        with self.assertRaises(ValueError):
+            resize_avatar(b"not an image")
+
+    async def test_read_upload_limit(self):
+        data = make_image()
+        self.assertEqual(await read_upload(UploadFile(io.BytesIO(data)), len(data)), data)
+        with self.assertRaises(HTTPException) as ctx:
+            await read_upload(UploadFile(io.BytesIO(data)), len(data) - 1)
+        self.assertEqual(ctx.exception.status_code, 413)
+
+    async def test_local_storage(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root, "/api/users/")
+            url = await storage.save(User(id=1), {64: b"small", 250: b"large"})
+            self.assertTrue(url.startswith("/api/users/1/avatar?v="))
+            digest = storage.digest(url)
+            self.assertEqual(len(digest), 32)
+            path, stat = storage.find(digest, 64)
+            self.assertEqual(path.read_bytes(), b"small")
+            self.assertEqual(stat.st_size, 5)
+            self.assertIsNone(storage.find(digest, 128))
+            self.assertEqual(await storage.save(User(id=1), {64: b"small", 250: b"large"}), url)
+            self.assertEqual(len(list(Path(root).glob("*/*/*"))), 2)
+
+    def test_local_storage_digest(self):
+        storage = LocalStorage("media", "/api/users")
+        self.assertIsNone(storage.digest("https://www.gravatar.com/avatar/abc"))
+        self.assertIsNone(storage.digest("/api/users/1/avatar?v=../../etc"))
+        self.assertIsNone(storage.digest("https://evil.example/api/users/1/avatar?v=" + "0" * 32))
+        self.assertEqual(storage.digest("/api/users/1/avatar?v=" + "0" * 32), "0" * 32)
+
+    async def test_local_storage_concurrent_saves(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root, "/api/users")
+            data = b"png" * 100_000
+            path = storage.path("0" * 32, 250)
+            await asyncio.gather(*(asyncio.to_thread(storage.write, path, data) for _ in range(20)))
+            self.assertEqual(path.read_bytes(), data)
+            self.assertEqual([p.name for p in path.parent.iterdir()], ["250.png"])
+
+
+    def test_storage_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AvatarStorage()
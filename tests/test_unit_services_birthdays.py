@@ -0,0 +1,54 @@
+import unittest
+from collections import namedtuple
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+
+from src.services.birthdays import send_digests
+
+Row = namedtuple(
+    "Row",
+    ["user_id", "owner_email", "owner_username", "name", "surname", "phone_number", "birthdate"],
+)
+
+
+def row(user_id, name, birthdate):
+    return Row(user_id, f"user{user_id}@gmail.com", f"user{user_id}", name, "test", "0500000000", birthdate)
+
+
+class TestSendDigests(unittest.IsolatedAsyncioTestCase):
+
+    async def test_one_digest_per_owner(self):
+        partitions = [
+            [row(1, "jan", datetime(1990, 1, 2)), row(1, "dec", datetime(1991, 12, 30))],
+            [row(1, "dec31", datetime(1992, 12, 31)), row(2, "other", datetime(1993, 1, 1))],
+        ]
+
+        async def stream(db, today, days, chunk_size):
+            for partition in partitions:
+                yield partition
+
+        send = AsyncMock()
+        with patch("src.repository.contacts.stream_upcoming_birthdays", stream), patch(
+            "src.services.birthdays.send_birthday_digests", send
+        ):
+            report = await send_digests(None, date(2025, 12, 29), days=7, flush_every=1)
+
+        self.assertEqual(report["rows"], 4)
+        self.assertEqual(report["emails"], 2)
+        digests = [digest for call in send.await_args_list for digest in call.args[0]]
+        self.assertEqual([(email, username) for email, username, _ in digests],
+                         [("user1@gmail.com", "user1"), ("user2@gmail.com", "user2")])
+        self.assertEqual([b["name"] for b in digests[0][2]], ["dec", "dec31", "jan"])
+
+    async def test_no_rows_no_emails(self):
+        async def stream(db, today, days, chunk_size):
+            return
+            yield
+
+        send = AsyncMock()
+        with patch("src.repository.contacts.stream_upcoming_birthdays", stream), patch(
+            "src.services.birthdays.send_birthday_digests", send
+        ):
+            report = await send_digests(None, date(2025, 6, 1))
+        self.assertEqual(report["emails"], 0)
+        send.assert_not_awaited()
@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from redis.exceptions import ConnectionError
+
+from src.entity.models import Contact, User
+from src.services.cache import ContactsCache, contact_adapter, contact_list_adapter
+from src.services.etag import etag_matches, weak_etag
+from tests.conftest import FakeRedis
+
+
+class TestContactsCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.cache = ContactsCache(self.redis, ttl={"contact": 60, "contacts": 60})
+        self.user = User(id=1, username="test_user", email="test@gmail.com")
+        self.contact = Contact(
+            id=1,
+            name="test",
+            surname="test",
+            email="test@gmail.com",
+            phone_number="1234567890",
+            birthdate=datetime(2025, 1, 1),
+            created_at=datetime(2025, 1, 1),
+            user=self.user,
+        )
+
+    async def test_get_or_load_caches_result(self):
+        loader = AsyncMock(return_value=[self.contact])
+        first = await self.cache.get_or_load(1, "contacts", {"offset": 0}, loader, contact_list_adapter)
+        second = await self.cache.get_or_load(1, "contacts", {"offset": 0}, loader, contact_list_adapter)
+        self.assertEqual(first, second)
+        self.assertEqual(second[0].name, "test")
+        self.assertEqual(second[0].user.email, "test@gmail.com")
+        loader.assert_awaited_once()
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    async def test_invalidate_bumps_generation(self):
+        loader = AsyncMock(return_value=self.contact)
+        await self.cache.get_or_load(1, "contact", {"contact_id": 1}, loader, contact_adapter)
+        generation = await self.cache.generation(1)
+        await self.cache.invalidate(1)
+        self.assertEqual(await self.cache.generation(1), generation + 1)
+        await self.cache.get_or_load(1, "contact", {"contact_id": 1}, loader, contact_adapter)
+        self.assertEqual(loader.await_count, 2)
+
+    async def test_invalidate_is_per_user(self):
+        loader = AsyncMock(return_value=self.contact)
+        await self.cache.get_or_load(1, "contact", {"contact_id": 1}, loader, contact_adapter)
+        await self.cache.invalidate(2)
+        await self.cache.get_or_load(1, "contact", {"contact_id": 1}, loader, contact_adapter)
+        loader.assert_awaited_once()
+
+    async def test_none_is_not_cached(self):
+        loader = AsyncMock(return_value=None)
+        await self.cache.get_or_load(1, "contact", {"contact_id": 2}, loader, contact_adapter)
+        result = await self.cache.get_or_load(1, "contact", {"contact_id": 2}, loader, contact_adapter)
+        self.assertIsNone(result)
+        self.assertEqual(loader.await_count, 2)
+
+    async def test_redis_error_falls_back_to_loader(self):
+        broken = MagicMock()
+        broken.get = AsyncMock(side_effect=ConnectionError())
+        cache = ContactsCache(broken, ttl={"contact": 60})
+        loader = AsyncMock(return_value=self.contact)
+        result = await cache.get_or_load(1, "contact", {"contact_id": 1}, loader, contact_adapter)
+        self.assertIs(result, self.contact)
+        self.assertEqual(cache.stats()["errors"], 1)
+
+
+class TestEtag(unittest.TestCase):
+
+    def test_etag_matches(self):
+        etag = weak_etag(1, 2, "contacts")
+        self.assertEqual(etag, 'W/"1-2-contacts"')
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches('"1-2-contacts"', etag))
+        self.assertTrue(etag_matches('W/"other", W/"1-2-contacts"', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('W/"1-3-contacts"', etag))
+        self.assertFalse(etag_matches(None, etag))
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncpg
+
+from redis.exceptions import ConnectionError
+
+from src.services.cache import ContactsCache
+from src.services.invalidation import InvalidationBus, PostgresInvalidationBus
+from tests.conftest import FakeRedis
+
+
+class FlakyBus(InvalidationBus):
+    """
+    Drops the connection after the first event of every subscription.
+    """
+
+    def __init__(self, events):
+        super().__init__("test", min_backoff=0, max_backoff=0)
+        self.events = list(events)
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+    async def subscribe(self):
+        yield None
+        if not self.events:
+            await asyncio.Event().wait()
+        yield self.events.pop(0)
+        raise ConnectionError("connection lost")
+
+
+class FakeConnection:
+    """
+    Fails like asyncpg when a second query starts before the first one has finished.
+    """
+
+    def __init__(self):
+        self.busy = False
+        self.executed = []
+
+    def is_closed(self):
+        return False
+
+    async def execute(self, query, *args):
+        if self.busy:
+            raise asyncpg.InterfaceError("another operation is in progress")
+        self.busy = True
+        await asyncio.sleep(0)
+        self.executed.append(args)
+        self.busy = False
+
+
+def event(kind, key):
+    return json.dumps({"kind": kind, "key": key})
+
+
+class TestInvalidationBus(unittest.IsolatedAsyncioTestCase):
+
+    async def test_dispatch_calls_handlers_of_kind(self):
+        bus = FlakyBus([])
+        user_handler, contacts_handler = MagicMock(), MagicMock()
+        bus.on("user", user_handler)
+        bus.on("contacts", contacts_handler)
+        bus.dispatch(event("user", "test@gmail.com"))
+        bus.dispatch(b"not json")
+        user_handler.assert_called_once_with("test@gmail.com")
+        contacts_handler.assert_not_called()
+
+    async def test_publish_swallows_errors(self):
+        bus = FlakyBus([])
+        bus.send = AsyncMock(side_effect=ConnectionError())
+        await bus.publish("user", "test@gmail.com")
+
+    async def test_listen_resubscribes_and_flushes(self):
+        bus = FlakyBus([event("user", "a@gmail.com"), event("user", "b@gmail.com")])
+        handler = MagicMock()
+        bus.on("user", handler)
+        bus.start()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        await bus.stop()
+        self.assertEqual(
+            [call.args[0] for call in handler.call_args_list],
+            [None, "a@gmail.com", None, "b@gmail.com", None],
+        )
+        self.assertEqual(bus.reconnects, 2)
+
+    async def test_contacts_cache_publishes_on_invalidate(self):
+        bus = FlakyBus([])
+        cache = ContactsCache(FakeRedis(), ttl={"contacts": 60}, bus=bus)
+        await cache.invalidate(1)
+        self.assertEqual(bus.sent, [event("contacts", "1")])
+
+    async def test_failing_handler_does_not_stop_others(self):
+        bus = FlakyBus([])
+        failing, handler = MagicMock(side_effect=RuntimeError("boom")), MagicMock()
+        bus.on("user", failing)
+        bus.on("user", handler)
+        bus.dispatch(event("user", "test@gmail.com"))
+        bus.flush()
+        self.assertEqual([call.args[0] for call in handler.call_args_list], ["test@gmail.com", None])
+
+    async def test_listen_survives_unexpected_errors(self):
+        bus = FlakyBus([event("user", "a@gmail.com")])
+        bus.on("user", MagicMock(side_effect=RuntimeError("boom")))
+        subscribe = bus.subscribe
+
+        async def broken_then_working():
+            if bus.reconnects == 0:
+                raise RuntimeError("unexpected")
+            async for payload in subscribe():
+                yield payload
+
+        bus.subscribe = broken_then_working
+        bus.start()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        self.assertFalse(bus.task.done())
+        await bus.stop()
+        self.assertGreaterEqual(bus.reconnects, 2)
+
+    def test_bus_is_abstract(self):
+        with self.assertRaises(TypeError):
+            InvalidationBus("test")
+
+    async def test_publish_swallows_interface_errors(self):
+        bus = FlakyBus([])
+        bus.send = AsyncMock(side_effect=asyncpg.InterfaceError("connection is closed"))
+        await bus.publish("user", "test@gmail.com")
+
+
+class TestPostgresInvalidationBus(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_publishes_share_one_connection(self):
+        bus = PostgresInvalidationBus("postgresql://localhost/test")
+        connection = FakeConnection()
+        with patch("asyncpg.connect", AsyncMock(return_value=connection)) as connect:
+            await asyncio.gather(*(bus.publish("contacts", str(i)) for i in range(5)))
+        connect.assert_awaited_once()
+        self.assertEqual(len(connection.executed), 5)
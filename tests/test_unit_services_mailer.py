@@ -0,0 +1,109 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import aiosmtplib
+
+from src.services.mailer import Mailer
+from src.services.outbox import EmailOutbox
+
+job = {
+    "template": "verify_email.html",
+    "subject": "Confirm your email ",
+    "to": "test@gmail.com",
+    "context": {"host": "http://localhost/", "username": "test_user", "token": "token"},
+    "attempts": 0,
+}
+
+
+class FakeSMTP:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.is_connected = False
+        self.connects = 0
+        self.messages = []
+
+    async def connect(self):
+        self.is_connected = True
+        self.connects += 1
+
+    async def send_message(self, message):
+        if self.fail:
+            raise aiosmtplib.SMTPServerDisconnected("gone")
+        self.messages.append(message)
+
+    def close(self):
+        self.is_connected = False
+
+
+class TestMailer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.outbox = AsyncMock()
+        self.mailer = Mailer(self.outbox, 2, 10, "localhost", 25, sender="bot@example.com")
+
+    def test_render(self):
+        message = self.mailer.render(job)
+        self.assertEqual(message["To"], "test@gmail.com")
+        self.assertIn("api/auth/confirmed_email/token", message.get_content())
+
+    async def test_send_batch_reuses_connections(self):
+        self.mailer.pool = [FakeSMTP(), FakeSMTP()]
+        await self.mailer.send_batch([(str(i), job) for i in range(4)])
+        await self.mailer.send_batch([(str(i), job) for i in range(4, 8)])
+        self.assertEqual([smtp.connects for smtp in self.mailer.pool], [1, 1])
+        self.assertEqual(sum(len(smtp.messages) for smtp in self.mailer.pool), 8)
+        self.outbox.ack.assert_awaited_with(["4", "6", "5", "7"])
+        self.outbox.retry.assert_not_awaited()
+
+    async def test_send_batch_retries_failures(self):
+        self.mailer.pool = [FakeSMTP(), FakeSMTP(fail=True)]
+        await self.mailer.send_batch([("1", job), ("2", job)])
+        self.outbox.ack.assert_awaited_once_with(["1"])
+        self.outbox.retry.assert_awaited_once_with("2", job, "gone")
+        self.assertFalse(self.mailer.pool[1].is_connected)
+
+    async def test_send_batch_dead_letters_unrenderable_jobs(self):
+        self.mailer.pool = [FakeSMTP(), FakeSMTP()]
+        missing = {**job, "template": "missing.html"}
+        malformed = {key: value for key, value in job.items() if key != "context"}
+        await self.mailer.send_batch([("1", missing), ("2", job), ("3", malformed)])
+        self.outbox.ack.assert_awaited_once_with(["2"])
+        self.outbox.retry.assert_not_awaited()
+        self.assertEqual(
+            [call.args[:2] for call in self.outbox.dead_letter.await_args_list],
+            [("1", missing), ("3", malformed)],
+        )
+        self.assertEqual(self.mailer.pool[0].connects, 0)
+        self.assertEqual(self.mailer.failed, 2)
+
+
+class TestEmailOutbox(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.redis = MagicMock()
+        self.redis.pipeline.return_value.__aenter__.return_value = self.pipe
+        self.outbox = EmailOutbox(self.redis, max_attempts=2, backoff=5)
+
+    async def test_retry_delays_job(self):
+        await self.outbox.retry("1-0", job, "gone")
+        payload, = self.pipe.zadd.call_args.args[1]
+        self.assertEqual(json.loads(payload)["attempts"], 1)
+        self.pipe.xadd.assert_not_called()
+        self.pipe.xack.assert_called_once_with("outbox:email", "mailers", "1-0")
+
+    async def test_retry_dead_letters_after_max_attempts(self):
+        await self.outbox.retry("1-0", {**job, "attempts": 1}, "gone")
+        self.assertEqual(self.pipe.xadd.call_args.args[0], "outbox:email:dead")
+        self.pipe.zadd.assert_not_called()
+
+    async def test_dead_letter_moves_job_at_once(self):
+        await self.outbox.dead_letter("1-0", job, "TemplateNotFound('missing.html')")
+        self.assertEqual(self.pipe.xadd.call_args.args[0], "outbox:email:dead")
+        payload = json.loads(self.pipe.xadd.call_args.args[1]["payload"])
+        self.assertEqual(payload["attempts"], 0)
+        self.assertEqual(payload["error"], "TemplateNotFound('missing.html')")
+        self.pipe.xack.assert_called_once_with("outbox:email", "mailers", "1-0")
+        self.pipe.xdel.assert_called_once_with("outbox:email", "1-0")
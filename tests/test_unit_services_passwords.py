@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+
+from src.services.passwords import PasswordService
+
+
+class TestPasswordService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.service = PasswordService(rounds=4, workers=2)
+
+    async def test_hash_and_verify(self):
+        hashed = await self.service.hash("12345678")
+        self.assertTrue(await self.service.verify("12345678", hashed))
+        self.assertFalse(await self.service.verify("invalid", hashed))
+        stats = self.service.stats()
+        self.assertEqual(stats["calls"], 3)
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["queued"], 0)
+
+    async def test_verify_and_update_keeps_tuned_hash(self):
+        hashed = await self.service.hash("12345678")
+        self.assertEqual(await self.service.verify_and_update("12345678", hashed), (True, None))
+
+    async def test_verify_and_update_rehashes_other_cost(self):
+        hashed = PasswordService(rounds=5, workers=1).context.hash("12345678")
+        valid, new_hash = await self.service.verify_and_update("12345678", hashed)
+        self.assertTrue(valid)
+        self.assertIn("$04$", new_hash)
+
+    async def test_verify_and_update_wrong_password(self):
+        hashed = PasswordService(rounds=5, workers=1).context.hash("12345678")
+        self.assertEqual(await self.service.verify_and_update("invalid", hashed), (False, None))
+
+    async def test_counters_settle_after_concurrent_calls(self):
+        await asyncio.gather(*(self.service.hash("12345678") for _ in range(20)))
+        stats = self.service.stats()
+        self.assertEqual(stats["calls"], 20)
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["queued"], 0)
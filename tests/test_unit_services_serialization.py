@@ -0,0 +1,45 @@
+import json
+import unittest
+from datetime import datetime
+
+from fastapi import Response
+
+from src.entity.models import Contact, User
+from src.services.cache import contact_adapter, contact_list_adapter
+from src.services.serialization import json_response
+
+
+class TestJsonResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.user = User(id=1, username="test_user", email="test@gmail.com")
+        self.contact = Contact(
+            id=1,
+            name="test",
+            surname="test",
+            email="test@gmail.com",
+            phone_number="1234567890",
+            birthdate=datetime(2025, 1, 1),
+            created_at=datetime(2025, 1, 1),
+            user=self.user,
+        )
+
+    def test_serializes_orm_list(self):
+        result = json_response([self.contact], contact_list_adapter)
+        self.assertEqual(result.media_type, "application/json")
+        body = json.loads(result.body)
+        self.assertEqual(body[0]["name"], "test")
+        self.assertEqual(body[0]["user"]["email"], "test@gmail.com")
+
+    def test_accepts_validated_models(self):
+        model = contact_adapter.validate_python(self.contact, from_attributes=True)
+        result = json_response(model, contact_adapter)
+        self.assertEqual(json.loads(result.body)["id"], 1)
+
+    def test_keeps_dependency_headers(self):
+        response = Response()
+        response.headers["ETag"] = 'W/"abc"'
+        response.headers["X-Next-Cursor"] = "next"
+        result = json_response([self.contact], contact_list_adapter, response)
+        self.assertEqual(result.headers["etag"], 'W/"abc"')
+        self.assertEqual(result.headers["x-next-cursor"], "next")
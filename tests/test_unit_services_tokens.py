@@ -0,0 +1,35 @@
+import unittest
+
+from src.services.tokens import RefreshTokenStore
+from tests.conftest import FakeRedis
+
+
+class TestRefreshTokenStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.store = RefreshTokenStore(self.redis, ttl=60)
+
+    async def test_consume_once(self):
+        await self.store.add("jti1", "test@gmail.com")
+        self.assertTrue(await self.store.consume("jti1", "test@gmail.com"))
+        self.assertFalse(await self.store.consume("jti1", "test@gmail.com"))
+        self.assertEqual(await self.redis.smembers(self.store.user_key("test@gmail.com")), set())
+
+    async def test_consume_checks_owner(self):
+        await self.store.add("jti1", "test@gmail.com")
+        self.assertFalse(await self.store.consume("jti1", "other@gmail.com"))
+
+    async def test_revoke(self):
+        await self.store.add("jti1", "test@gmail.com")
+        await self.store.revoke("jti1", "test@gmail.com")
+        self.assertFalse(await self.store.consume("jti1", "test@gmail.com"))
+
+    async def test_revoke_all(self):
+        await self.store.add("jti1", "test@gmail.com")
+        await self.store.add("jti2", "test@gmail.com")
+        await self.store.add("jti3", "other@gmail.com")
+        await self.store.revoke_all("test@gmail.com")
+        self.assertFalse(await self.store.consume("jti1", "test@gmail.com"))
+        self.assertFalse(await self.store.consume("jti2", "test@gmail.com"))
+        self.assertTrue(await self.store.consume("jti3", "other@gmail.com"))